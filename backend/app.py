@@ -1,17 +1,23 @@
-from flask import Flask, request, jsonify, send_file 
+from flask import Flask, request, jsonify, send_file, Response
 from dotenv import load_dotenv
 from flask_cors import CORS 
 import os
+import json
 import uuid
 import time
-import threading
-from threading import Timer
 import atexit
-from translator import translate_rpgm_file, get_translation_status, update_translation_status
-from file_handler import create_zip, save_uploaded_file, get_file_path, clean_up_files, parse_json_file, save_json_file
+from urllib.parse import quote
 
+# The project modules read their settings from the environment when they are imported.
 load_dotenv()
 
+from translator import translate_rpgm_file, get_translation_status, update_translation_status, save_log_edits, job_store, apply_edits, target_language_list, record_edits
+from file_handler import save_uploaded_file, get_file_path, clean_up_files, update_json_file, UploadError
+from translation_log import TranslationLog
+from zip_archive import update_zip_members, iter_directory_zip
+from job_scheduler import JobScheduler
+import metrics
+
 app = Flask(__name__)
 CORS(app)
 
@@ -20,20 +26,25 @@ if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-def cleanup_old_data():
-    import time
-    from translator import translation_status
-    
-    current_time = time.time()
-    for job_id in list(translation_status.keys()):
-        if current_time - translation_status[job_id].get('timestamp', 0) > 86400:
+LOG_PAGE_LIMIT = int(os.environ.get('LOG_PAGE_LIMIT', 1000))
+STREAM_INTERVAL = 1.0
+
+def cleanup_expired_jobs():
+    """Removes the files of jobs whose status expired from the job store (JOB_TTL)."""
+    try:
+        for job_id in job_store.purge_expired():
             clean_up_files(job_id)
-            del translation_status[job_id]
-    
-    Timer(3600, cleanup_old_data).start()
+    except Exception as e:
+        print(f"Could not clean up expired jobs: {e}")
 
-Timer(3600, cleanup_old_data).start()
-atexit.register(cleanup_old_data)
+scheduler = JobScheduler(translate_rpgm_file)
+metrics.registry.register(metrics.Gauge('rpgm_job_queue_depth', 'Jobs waiting in the queue.', scheduler.depth))
+# Process-pool workers re-import this module as __mp_main__ and must not start background work.
+# With the debug reloader only the child process (WERKZEUG_RUN_MAIN) should run jobs.
+if __name__ != '__mp_main__':
+    atexit.register(cleanup_expired_jobs)
+    if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        scheduler.start()
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
@@ -45,10 +56,15 @@ def upload_file():
         return jsonify({'error': 'No selected file'}), 400
     
     if file:
+        cleanup_expired_jobs()
         job_id = str(uuid.uuid4())
         original_filename = file.filename
         
-        file_path = save_uploaded_file(file, job_id)
+        try:
+            file_path = save_uploaded_file(file, job_id)
+        except UploadError as e:
+            clean_up_files(job_id)
+            return jsonify({'error': str(e)}), 400
         
         update_translation_status(job_id, {
             'status': 'uploaded', 
@@ -66,28 +82,80 @@ def upload_file():
 def translate_file():
     data = request.json
     job_id = data.get('job_id')
-    target_language = data.get('target_language')
+    # One language (target_language) or several (target_languages, or a list in target_language)
+    target_languages = target_language_list(data.get('target_languages') or data.get('target_language') or [])
     source_language = data.get('source_language', 'it')
+    project_id = data.get('project_id')
     
-    if not job_id or not target_language:
+    if not job_id or not target_languages:
         return jsonify({'error': 'Missing job_id or target_language'}), 400
     
     try:
-        thread = threading.Thread(target=translate_rpgm_file, args=(job_id, target_language, source_language))
-        thread.start()
-        
-        return jsonify({'status': 'processing', 'message': 'Translation has started.'}), 202
+        original_filename = get_translation_status(job_id).get('original_filename')
+        # Written by the scheduler before the queue row is committed: a running job is never touched,
+        # and a worker cannot claim the new job before its status says queued.
+        queued = lambda: update_translation_status(job_id, {
+            'status': 'queued',
+            'original_filename': original_filename,
+            'message': 'Translation is queued.'
+        })
+        if not scheduler.submit(job_id, ','.join(target_languages), source_language, original_filename, project_id,
+                                on_queued=queued):
+            return jsonify({'error': 'This job is already queued or running.'}), 409
+        return jsonify({'status': 'queued', 'message': 'Translation has been queued.',
+                        'queue_position': scheduler.position(job_id)}), 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def build_status_response(job_id, since=None):
+    """Status counters only; when `since` is given, also the log entries appended after that cursor."""
+    # The log is only loaded (and only its new chunks) when entries are asked for.
+    status = get_translation_status(job_id, logs=since is not None)
+    response = {key: value for key, value in status.items() if key != 'logs'}
+    response.setdefault('log_count', 0)
+    if since is not None:
+        logs = status.get('logs', [])
+        since = max(0, min(since, len(logs)))
+        response['logs'] = logs[since:since + LOG_PAGE_LIMIT]
+        response['next_cursor'] = since + len(response['logs'])
+    position = scheduler.position(job_id)
+    if position is not None:
+        response['queue_position'] = position
+        response['queue_depth'] = scheduler.depth()
+    return response
+
 @app.route('/api/status/<job_id>', methods=['GET'])
 def get_translation_status_endpoint(job_id):
     try:
-        status = get_translation_status(job_id)
-        return jsonify(status), 200
+        return jsonify(build_status_response(job_id, request.args.get('since', type=int))), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/status/<job_id>/stream', methods=['GET'])
+def stream_translation_status(job_id):
+    since = request.args.get('since', 0, type=int)
+
+    def events():
+        cursor = since
+        while True:
+            response = build_status_response(job_id, cursor)
+            cursor = response['next_cursor']
+            yield f"data: {json.dumps(response)}\n\n"
+            caught_up = cursor >= response['log_count']
+            if response.get('status') in ['completed', 'error', 'not_found'] and caught_up: break
+            if caught_up: time.sleep(STREAM_INTERVAL)
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+def timed_zip_stream(translated_dir):
+    started = time.perf_counter()
+    yield from iter_directory_zip(translated_dir)
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - started, 'zip')
+
+@app.route('/api/metrics')
+def metrics_endpoint():
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/download/<job_id>')
 def download_file(job_id):
     try:
@@ -100,21 +168,39 @@ def download_file(job_id):
 
         # 2. Cari lokasi file
         translated_dir = get_file_path(job_id, translated=True)
+        # A job with several languages has one folder per language; without ?language= all of them are sent.
+        language = request.args.get('language')
+        languages = status.get('languages', {})
+        if language and len(languages) > 1:
+            if language not in languages:
+                return jsonify({'error': f"Language '{language}' is not part of this job."}), 404
+            zip_filename = languages[language]['zip_filename']
+            return Response(timed_zip_stream(os.path.join(translated_dir, language)), mimetype='application/zip',
+                            headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(zip_filename)}"})
         zip_path = os.path.join(os.path.dirname(translated_dir), zip_filename)
         
         # 3. Kirim file dengan nama yang benar
-        return send_file(zip_path, as_attachment=True, download_name=zip_filename)
+        # Archives are built while they are sent; a zip on disk only exists for older jobs.
+        if os.path.exists(zip_path):
+            return send_file(zip_path, as_attachment=True, download_name=zip_filename)
+        return Response(timed_zip_stream(translated_dir), mimetype='application/zip',
+                        headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(zip_filename)}"})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/translated_data/<job_id>', methods=['GET'])
 def get_translated_data_route(job_id):
     try:
-        status = get_translation_status(job_id)
+        status = get_translation_status(job_id, logs=True)
         if status.get('status') != 'completed':
             return jsonify({'error': 'Translation not yet completed.'}), 400
-        
-        return jsonify({'logs': status.get('logs', [])}), 200
+
+        logs = status.get('logs', [])
+        offset = max(0, request.args.get('offset', 0, type=int))
+        limit = max(1, min(request.args.get('limit', LOG_PAGE_LIMIT, type=int), LOG_PAGE_LIMIT))
+        page = logs[offset:offset + limit]
+        next_offset = offset + len(page) if offset + len(page) < len(logs) else None
+        return jsonify({'logs': page, 'total': len(logs), 'offset': offset, 'next_offset': next_offset}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -127,39 +213,45 @@ def edit_translation_route(job_id):
         if not edited_logs:
             return jsonify({'error': 'No edited logs provided.'}), 400
 
+        status = get_translation_status(job_id, logs=True)
+        log = status.get('logs')
+        if status.get('status') != 'completed' or not isinstance(log, TranslationLog):
+            return jsonify({'error': 'Translation not completed or no longer editable.'}), 400
+
+        # Log entry ids resolve through the extraction index to (file, JSON location);
+        # only entries whose text actually changed are written.
         translated_dir = get_file_path(job_id, translated=True)
-        files_to_update = {}
+        changes = {}
         for log_entry in edited_logs:
-            if log_entry.get('type') in ['object', 'dialog', 'common_event'] and log_entry.get('path'):
-                file_name = log_entry.get('file')
-                if file_name not in files_to_update:
-                    file_path = os.path.join(translated_dir, file_name)
-                    if os.path.exists(file_path):
-                        files_to_update[file_name] = parse_json_file(file_path)
-                
-                if file_name in files_to_update:
-                    path_parts = log_entry['path'].replace('[', '.').replace(']', '').split('.')
-                    current_data = files_to_update[file_name]
-                    for part in path_parts[:-1]:
-                        if part.isdigit():
-                            current_data = current_data[int(part)]
-                        else:
-                            current_data = current_data[part]
-                    
-                    final_key = path_parts[-1]
-                    if final_key.isdigit():
-                        current_data[int(final_key)] = log_entry['translated']
-                    else:
-                        current_data[final_key] = log_entry['translated']
-
-        for file_name, content in files_to_update.items():
-            file_path = os.path.join(translated_dir, file_name)
-            save_json_file(content, file_path)
-        
-        zip_path = create_zip(translated_dir, job_id)
+            position = log_entry.get('id')
+            if not isinstance(position, int) or not isinstance(log_entry.get('translated'), str): continue
+            located = log.locate(position)
+            if located is None or log.records[position].translated == log_entry['translated']: continue
+            changes.setdefault(located[0], {})[position] = log_entry['translated']
+
+        # The log shows what was written, including any rewrapping of message blocks, and the
+        # records after a block that gained or lost lines move with their commands.
+        changed = []
+        for relative_path, edits in changes.items():
+            changed.extend(update_json_file(os.path.join(translated_dir, relative_path), lambda data: apply_edits(data, log, edits)))
+
+        if changes:
+            save_log_edits(job_id, log, changed)
+            try:
+                record_edits(job_id, status, {relative_path: (log.records[slice(*log.segment_bounds(next(iter(edits))))],
+                                                              [log.records[position] for position in edits])
+                                              for relative_path, edits in changes.items()})
+            except Exception as e:
+                print(f"Could not record edits in the project manifest: {e}")
+            zip_filename = status.get('zip_filename', 'translated.zip')
+            zip_path = os.path.join(os.path.dirname(translated_dir), zip_filename)
+            if os.path.exists(zip_path):
+                update_zip_members(zip_path, {relative_path.replace(os.sep, '/'): os.path.join(translated_dir, relative_path)
+                                              for relative_path in changes})
         
         return jsonify({
             'message': 'Translations updated successfully.',
+            'updated_entries': sum(len(file_changes) for file_changes in changes.values()),
             'download_url': f"/api/download/{job_id}"
         }), 200
     except Exception as e:
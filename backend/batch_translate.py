@@ -0,0 +1,181 @@
+"""
+Translates RPG Maker project folders from the command line, without the web server, uploads or zips.
+
+    python batch_translate.py en games/ --batch --output translated/ --jobs 4
+    python batch_translate.py en,fr,de MyGame --output translated/
+    python batch_translate.py en MyGame --in-place
+
+Every project runs through translate_rpgm_file on the same translation memory, batch pool and
+(with --process-workers) process pool. One JSON summary per project is printed and appended to
+--summary; projects already completed there for the same languages and destination are skipped
+when the command is run again, so an interrupted batch resumes where it stopped. Other output goes
+to stderr.
+
+--in-place first copies each data file to <project>/.rpgm-translator/original/ and always translates
+from those copies, so a run interrupted after some files were overwritten can simply be run again.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+import multiprocessing
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dotenv import load_dotenv
+
+SUMMARY_FIELDS = ['total_files', 'total_translations', 'unique_strings', 'translated_strings', 'reused_strings',
+                  'unchanged_files', 'cache_hits', 'cache_misses', 'cache_hit_rate', 'backend_calls', 'retries',
+                  'failed_strings', 'failed_requests', 'unmasked_retries', 'stage_seconds', 'slowest_files']
+ORIGINALS_FOLDER = os.path.join('.rpgm-translator', 'original')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Translate RPG Maker MV/MZ project folders without the web server.')
+    parser.add_argument('target_language', help='target language, or several separated by commas')
+    parser.add_argument('paths', nargs='+', help='project folders (with --batch: folders containing projects)')
+    parser.add_argument('--source-language', default='it')
+    parser.add_argument('--batch', action='store_true', help='treat every subfolder of each path as a project')
+    destination = parser.add_mutually_exclusive_group(required=True)
+    destination.add_argument('--output', help='write each project to OUTPUT/<project name>')
+    destination.add_argument('--in-place', action='store_true', help="overwrite the projects' own data files")
+    parser.add_argument('--jobs', type=int, default=1, help='projects translated at the same time')
+    parser.add_argument('--process-workers', type=int, help='worker processes shared by all projects (default: PROCESS_WORKERS)')
+    parser.add_argument('--backend', help='translation backend (default: TRANSLATION_BACKEND)')
+    parser.add_argument('--summary', default='batch_summary.jsonl', help='JSON lines file with one summary per finished project')
+    parser.add_argument('--restart', action='store_true', help='translate projects again even if --summary lists them as completed')
+    args = parser.parse_args()
+    args.languages = [language.strip() for language in args.target_language.split(',') if language.strip()]
+    if not args.languages: parser.error('no target language given')
+    if args.in_place and len(args.languages) > 1: parser.error('--in-place translates into a single language')
+    if args.jobs < 1: parser.error('--jobs must be at least 1')
+    return args
+
+def find_projects(paths, batch):
+    projects = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if not os.path.isdir(path): raise SystemExit(f"Not a folder: {path}")
+        if batch: projects.extend(sorted(entry.path for entry in os.scandir(path) if entry.is_dir()))
+        else: projects.append(path)
+    return list(dict.fromkeys(projects))
+
+def path_hash(path):
+    return hashlib.sha256(path.encode('utf-8')).hexdigest()[:12]
+
+def project_names(projects):
+    """Output folder name per project: its folder name, plus a hash where two projects share one."""
+    counts = {}
+    for project in projects: counts[os.path.basename(project)] = counts.get(os.path.basename(project), 0) + 1
+    return {project: os.path.basename(project) if counts[os.path.basename(project)] == 1
+            else f"{os.path.basename(project)}-{path_hash(project)[:8]}" for project in projects}
+
+def completed_projects(summary_path, languages):
+    """(project, output) pairs the summary file already records as completed for these languages."""
+    completed = set()
+    if not os.path.exists(summary_path): return completed
+    with open(summary_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try: summary = json.loads(line)
+            except ValueError: continue  # a line cut short by an interruption
+            if summary.get('status') == 'completed' and summary.get('target_languages') == languages:
+                completed.add((summary.get('project'), summary.get('output')))
+    return completed
+
+def keep_originals(translator, project):
+    """
+    Copies the project's data files that have no copy yet into ORIGINALS_FOLDER and returns that folder.
+    Files that already have one were kept by an earlier run and may since have been overwritten.
+    """
+    originals = os.path.join(project, ORIGINALS_FOLDER)
+    for file_path in translator.get_rpgm_files(project):
+        original = os.path.join(originals, os.path.relpath(file_path, project))
+        if os.path.exists(original): continue
+        os.makedirs(os.path.dirname(original), exist_ok=True)
+        shutil.copy2(file_path, original + '.tmp')
+        os.replace(original + '.tmp', original)
+    return originals
+
+def translate_project(translator, project, output_dir, args, process_pool):
+    job_id = f"batch-{path_hash(project)}"
+    name = os.path.basename(project)
+    source_dir = keep_originals(translator, project) if args.in_place else project
+    translator.update_translation_status(job_id, {'status': 'queued', 'original_filename': name})
+    started = time.perf_counter()
+    status = translator.translate_rpgm_file(job_id, args.languages, args.source_language, original_filename=name,
+                                            project_id=f"{name}-{path_hash(project)}", source_dir=source_dir,
+                                            output_dir=output_dir, process_pool=process_pool)
+    summary = {'project': project, 'output': output_dir, 'target_languages': args.languages,
+               'status': status.get('status'), 'seconds': round(time.perf_counter() - started, 3)}
+    if status.get('message'): summary['message'] = status['message']
+    summary.update({key: status[key] for key in SUMMARY_FIELDS if key in status})
+    logs = status.get('logs')
+    if logs:
+        types = [record.type for record in logs.records]
+        summary['errors'] = types.count('error')
+        summary['anomalies'] = types.count('anomaly')
+    if len(args.languages) > 1:
+        summary['languages'] = {language: {key: value for key, value in entry.items() if key not in ('download_url', 'zip_filename')}
+                                for language, entry in status.get('languages', {}).items()}
+    translator.job_store.delete(job_id)
+    return summary
+
+def main():
+    args = parse_args()
+    load_dotenv()
+    # Jobs only live as long as this command; the backend and worker count are read when translator is imported.
+    os.environ.setdefault('JOB_STORE', 'memory')
+    if args.backend: os.environ['TRANSLATION_BACKEND'] = args.backend
+    if args.process_workers is not None: os.environ['PROCESS_WORKERS'] = str(args.process_workers)
+
+    out = sys.stdout
+    with redirect_stdout(sys.stderr):
+        import translator
+
+        projects = find_projects(args.paths, args.batch)
+        names = project_names(projects)
+        output_dirs = {project: project if args.in_place else os.path.join(os.path.abspath(args.output), names[project])
+                       for project in projects}
+        done = set() if args.restart else completed_projects(args.summary, args.languages)
+        pending = [project for project in projects if (project, output_dirs[project]) not in done]
+        print(f"{len(projects)} projects, {len(projects) - len(pending)} already completed, {len(pending)} to translate.")
+
+        workers = translator.PROCESS_WORKERS
+        process_pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) if workers > 1 else None
+        summary_lock = threading.Lock()
+        failed = 0
+
+        def run(project):
+            nonlocal failed
+            output_dir = output_dirs[project]
+            try:
+                summary = translate_project(translator, project, output_dir, args, process_pool)
+            except Exception as e:
+                summary = {'project': project, 'output': output_dir, 'target_languages': args.languages,
+                           'status': 'error', 'message': str(e)}
+            line = json.dumps(summary, ensure_ascii=False)
+            with summary_lock:
+                if summary['status'] != 'completed': failed += 1
+                with open(args.summary, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                out.write(line + '\n')
+                out.flush()
+
+        executor = ThreadPoolExecutor(args.jobs, thread_name_prefix='batch-project')
+        try:
+            for _ in executor.map(run, pending): pass
+        except KeyboardInterrupt:
+            print("Interrupted: waiting for the running projects; the rest are translated on the next run.")
+            executor.shutdown(cancel_futures=True)
+            return 130
+        finally:
+            executor.shutdown()
+            if process_pool: process_pool.shutdown()
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Runs translate_rpgm_file end to end on a synthetic RPG Maker MV/MZ project against the mock backend.
+
+    python benchmarks/bench_pipeline.py --maps 50 --events 20 --duplicate-ratio 0.4 --latency 0.05 --json results.json
+
+Reports wall time, strings/sec, the parse / translate / write / zip split, peak RSS and backend
+calls. --json writes the same numbers (plus the settings and git commit) for comparing runs.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORDS = ['il', 'cavaliere', 'spada', 'drago', 'villaggio', 'oro', 'pozione', 'magia', 'castello', 'foresta', 're',
+         'principessa', 'mostro', 'tesoro', 'porta', 'chiave', 'notte', 'giorno', 'fuoco', 'acqua', 'vento', 'terra',
+         'dove', 'sei', 'andiamo', 'presto', 'aiuto', 'grazie', 'non', 'posso', 'vedere', 'nulla', 'qui']
+DATABASE_FILES = {
+    'Actors.json': ['name', 'nickname', 'profile'],
+    'Classes.json': ['name'],
+    'Skills.json': ['name', 'description', 'message1', 'message2'],
+    'Items.json': ['name', 'description'],
+    'Weapons.json': ['name', 'description'],
+    'Armors.json': ['name', 'description'],
+    'Enemies.json': ['name'],
+    'States.json': ['name', 'message1', 'message2', 'message3', 'message4'],
+}
+
+class TextSource:
+    """Random Italian-looking lines; `duplicate_ratio` of them repeat a line generated earlier."""
+
+    def __init__(self, duplicate_ratio, seed):
+        self.random = random.Random(seed)
+        self.duplicate_ratio = duplicate_ratio
+        self.lines = []
+
+    def line(self, min_words=3, max_words=12):
+        if self.lines and self.random.random() < self.duplicate_ratio: return self.random.choice(self.lines)
+        words = self.random.choices(WORDS, k=self.random.randint(min_words, max_words))
+        text = ' '.join(words).capitalize() + self.random.choice(['.', '!', '?', '...']) + f' {len(self.lines)}'
+        self.lines.append(text)
+        return text
+
+def synthetic_map(texts, map_id, events, pages, commands, map_size):
+    map_events = [None]
+    for e in range(1, events + 1):
+        event_pages = []
+        for p in range(pages):
+            command_list = []
+            for c in range(commands):
+                if c % 6 == 5:
+                    command_list.append({'code': 102, 'indent': 0, 'parameters': [[texts.line(1, 3), texts.line(1, 3)], 1, 0, 2, 0]})
+                    continue
+                if c % 3 == 0: command_list.append({'code': 101, 'indent': 0, 'parameters': ['Actor1', 0, 0, 2]})
+                command_list.append({'code': 401, 'indent': 0, 'parameters': [texts.line()]})
+            command_list.append({'code': 0, 'indent': 0, 'parameters': []})
+            event_pages.append({'conditions': {'actorValid': False, 'switch1Valid': False}, 'directionFix': False,
+                                'image': {'characterName': '', 'direction': 2, 'pattern': 0, 'tileId': 0},
+                                'list': command_list, 'moveFrequency': 3, 'moveType': 0, 'priorityType': 1, 'trigger': 0})
+        map_events.append({'id': e, 'name': f'EV{e:03d}', 'note': '', 'pages': event_pages, 'x': e % map_size, 'y': e // map_size})
+    return {'autoplayBgm': False, 'displayName': '', 'width': map_size, 'height': map_size, 'tilesetId': 1,
+            'data': [0] * (map_size * map_size * 6), 'events': map_events}
+
+def generate_project(directory, args):
+    """Writes a data/ folder: Map001..MapN, MapInfos, CommonEvents and the database files."""
+    texts = TextSource(args.duplicate_ratio, args.seed)
+    data_dir = os.path.join(directory, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+
+    def write(name, data):
+        with open(os.path.join(data_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    for m in range(1, args.maps + 1):
+        write(f'Map{m:03d}.json', synthetic_map(texts, m, args.events, args.pages, args.commands, args.map_size))
+    write('MapInfos.json', [None] + [{'id': m, 'name': f'MAP{m:03d}', 'order': m, 'parentId': 0} for m in range(1, args.maps + 1)])
+    common_events = [None]
+    for e in range(1, args.common_events + 1):
+        command_list = [{'code': 401, 'indent': 0, 'parameters': [texts.line()]} for _ in range(args.commands)]
+        common_events.append({'id': e, 'name': f'CE{e:03d}', 'list': command_list + [{'code': 0, 'indent': 0, 'parameters': []}]})
+    write('CommonEvents.json', common_events)
+    for file_name, keys in DATABASE_FILES.items():
+        write(file_name, [None] + [dict({'id': i}, **{key: texts.line(1, 8) for key in keys}) for i in range(1, args.database_items + 1)])
+    return len(texts.lines)
+
+def peak_rss_mb():
+    """Peak resident set size of this process plus its finished children (ru_maxrss is KB on Linux, bytes on macOS)."""
+    scale = 1 if sys.platform == 'darwin' else 1024
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return usage * scale / 1e6
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_once(translator, zip_archive, template_dir, run_index):
+    job_id = f'bench-{run_index}'
+    shutil.copytree(template_dir, os.path.join('uploads', job_id))
+    translator.translation_memory.clear()
+    translator.update_translation_status(job_id, {'status': 'queued', 'original_filename': 'bench.zip'})
+
+    timings = {}
+    translate_texts = translator.translate_texts
+    def timed_translate_texts(*args, **kwargs):
+        timings['translate_started'] = time.perf_counter()
+        try: return translate_texts(*args, **kwargs)
+        finally: timings['translate_finished'] = time.perf_counter()
+    translator.translate_texts = timed_translate_texts
+    try:
+        started = time.perf_counter()
+        result = translator.translate_rpgm_file(job_id, 'en', 'it', project_id=f'{job_id}-{time.time()}')
+        finished = time.perf_counter()
+    finally:
+        translator.translate_texts = translate_texts
+    if result.get('status') != 'completed': raise RuntimeError(f"Job failed: {result.get('message')}")
+
+    zip_bytes = 0
+    for chunk in zip_archive.iter_directory_zip(os.path.join('uploads', job_id, 'translated')): zip_bytes += len(chunk)
+    zipped = time.perf_counter()
+
+    translate_started = timings.get('translate_started', finished)
+    translate_finished = timings.get('translate_finished', finished)
+    wall = zipped - started
+    return {
+        'wall_seconds': round(wall, 4),
+        'stages': {'parse': round(translate_started - started, 4), 'translate': round(translate_finished - translate_started, 4),
+                   'write': round(finished - translate_finished, 4), 'zip': round(zipped - finished, 4)},
+        'translated_strings': result['total_translations'],
+        'unique_strings': result.get('unique_strings', 0),
+        'strings_per_second': round(result['total_translations'] / wall, 1) if wall > 0 else 0,
+        'backend_calls': result.get('backend_calls', 0),
+        'retries': result.get('retries', 0),
+        'failed_strings': result.get('failed_strings', 0),
+        'zip_bytes': zip_bytes,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--maps', type=int, default=20)
+    parser.add_argument('--events', type=int, default=20, help='events per map')
+    parser.add_argument('--pages', type=int, default=2, help='pages per event')
+    parser.add_argument('--commands', type=int, default=12, help='commands per event page / common event')
+    parser.add_argument('--map-size', type=int, default=40, help='map width and height in tiles')
+    parser.add_argument('--common-events', type=int, default=50)
+    parser.add_argument('--database-items', type=int, default=200, help='entries per database file')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.3)
+    parser.add_argument('--latency', type=float, default=0.05, help='mock backend seconds per request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of mock backend requests that fail')
+    parser.add_argument('--process-workers', type=int, default=0)
+    parser.add_argument('--runs', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    initial_dir = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix='rpgm-bench-')
+    os.environ.update({'TRANSLATION_BACKEND': 'mock', 'MOCK_BACKEND_LATENCY': str(args.latency),
+                       'MOCK_BACKEND_ERROR_RATE': str(args.error_rate), 'MOCK_BACKEND_SEED': str(args.seed),
+                       'TRANSLATION_BACKOFF_BASE': os.environ.get('TRANSLATION_BACKOFF_BASE', '0.05'),
+                       'TRANSLATION_CACHE_PATH': os.path.join(work_dir, 'translation_memory.sqlite3'),
+                       'PROJECTS_FOLDER': os.path.join(work_dir, 'projects'),
+                       'PROCESS_WORKERS': str(args.process_workers)})
+    os.chdir(work_dir)
+    try:
+        import translator
+        import zip_archive
+
+        template_dir = os.path.join(work_dir, 'template')
+        started = time.perf_counter()
+        generated = generate_project(template_dir, args)
+        data_bytes = sum(entry.stat().st_size for entry in os.scandir(os.path.join(template_dir, 'data')))
+        print(f"Generated {args.maps} maps, {generated} distinct lines, {data_bytes / 1e6:.1f} MB in {time.perf_counter() - started:.2f}s")
+
+        runs = []
+        for run_index in range(args.runs):
+            run = run_once(translator, zip_archive, template_dir, run_index)
+            runs.append(run)
+            stages = '  '.join(f"{stage} {seconds:.2f}s" for stage, seconds in run['stages'].items())
+            print(f"run {run_index + 1}: {run['wall_seconds']:.2f}s  {run['strings_per_second']:.0f} strings/s  "
+                  f"{run['backend_calls']} backend calls  [{stages}]")
+
+        report = {'commit': git_commit(), 'python': platform.python_version(), 'settings': vars(args),
+                  'backend': translator.backend.capabilities(), 'data_bytes': data_bytes,
+                  'peak_rss_mb': round(peak_rss_mb(), 1), 'runs': runs}
+        print(f"peak RSS {report['peak_rss_mb']:.1f} MB")
+        if args.json == '-': print(json.dumps(report, indent=2))
+        elif args.json:
+            with open(args.json if os.path.isabs(args.json) else os.path.join(initial_dir, args.json), 'w') as f:
+                json.dump(report, f, indent=2)
+    finally:
+        os.chdir(initial_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the original job log (a list of dicts whose 'file' is back-filled after every file)
+with TranslationLog on a synthetic project.
+
+    python benchmarks/bench_translation_log.py --files 300 --entries 400
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from translation_log import TranslationLog
+
+def synthetic_project(files, entries):
+    for f in range(files):
+        yield f'Map{f + 1:03d}.json', [(f'command[{i}].text', f'Riga di dialogo {i % 500}', f'Dialog line {i % 500}') for i in range(entries)]
+
+def legacy_log(project):
+    logs = []
+    for file_name, rows in project:
+        total = len(rows)
+        for i, (path, raw, translated) in enumerate(rows):
+            logs.append({'type': 'dialog', 'file': '', 'path': path, 'index': i + 1, 'total': total, 'raw': raw, 'translated': translated})
+        for log_entry in logs:
+            if log_entry.get('file') == '': log_entry['file'] = file_name
+    return logs
+
+def compact_log(project):
+    log = TranslationLog()
+    for file_name, rows in project:
+        total = len(rows)
+        log.begin_file(file_name)
+        for i, (path, raw, translated) in enumerate(rows):
+            log.add('dialog', path, i + 1, total, raw, translated)
+    return log
+
+def measure(build, files, entries):
+    project = [(name, rows) for name, rows in synthetic_project(files, entries)]
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    log = build(project)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return log, elapsed, current - baseline, peak - baseline
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=300)
+    parser.add_argument('--entries', type=int, default=400, help='log entries per file')
+    args = parser.parse_args()
+
+    total = args.files * args.entries
+    print(f"{args.files} files x {args.entries} entries = {total} log entries")
+    results = {}
+    for name, build in [('legacy list-of-dicts', legacy_log), ('TranslationLog', compact_log)]:
+        log, elapsed, retained, peak = measure(build, args.files, args.entries)
+        results[name] = log
+        print(f"{name:>22}: {elapsed:8.3f}s  retained {retained / 1e6:8.1f} MB  ({retained / total:6.1f} B/entry)  peak {peak / 1e6:8.1f} MB")
+
+    legacy, compact = results.values()
+    sample = [0, total // 2, total - 1]
+    assert all(legacy[i] == {k: v for k, v in compact[i].items() if k != 'id'} for i in sample), "logs differ"
+
+if __name__ == '__main__':
+    main()
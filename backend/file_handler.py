@@ -1,10 +1,69 @@
 import os
+import re
 import json
 import shutil
+from json.decoder import scanstring
 import zipfile
+from zip_archive import write_directory_zip
 from werkzeug.utils import secure_filename # pyright: ignore[reportMissingImports]
 
 UPLOAD_FOLDER = 'uploads'
+JSON_OUTPUT_FORMAT = os.environ.get('JSON_OUTPUT_FORMAT', 'indent')
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+json_decoder = json.JSONDecoder()
+
+# Limits for uploaded archives (zip bombs, oversized projects)
+MAX_ARCHIVE_MEMBERS = int(os.environ.get('MAX_ARCHIVE_MEMBERS', 200000))
+MAX_MEMBER_BYTES = int(os.environ.get('MAX_MEMBER_BYTES', 256 * 1024 * 1024))
+MAX_EXTRACTED_BYTES = int(os.environ.get('MAX_EXTRACTED_BYTES', 1024 * 1024 * 1024))
+# Large, empty maps compress very well, so the ratio is only checked past RATIO_CHECK_BYTES
+MAX_COMPRESSION_RATIO = int(os.environ.get('MAX_COMPRESSION_RATIO', 500))
+RATIO_CHECK_BYTES = 16 * 1024 * 1024
+EXTRACT_CHUNK_SIZE = 1 << 20
+
+class UploadError(Exception):
+    pass
+
+def archive_member_parts(name):
+    """Path parts of a member that can be translated (data/*.json, or a .json at the root), else None."""
+    parts = name.replace('\\', '/').split('/')
+    if name.startswith('/') or not parts[-1].lower().endswith('.json') or '__MACOSX' in parts: return None
+    if any(part in ('', '.', '..') or ':' in part for part in parts): return None
+    if len(parts) > 1 and parts[-2] != 'data': return None
+    return parts
+
+def _extract_member(zip_ref, info, target_path, budget):
+    """Copies one member in chunks, counting the bytes actually inflated rather than trusting the header."""
+    written = 0
+    with zip_ref.open(info) as source, open(target_path, 'wb') as target:
+        for chunk in iter(lambda: source.read(EXTRACT_CHUNK_SIZE), b''):
+            written += len(chunk)
+            if written > MAX_MEMBER_BYTES: raise UploadError(f"{info.filename} is larger than {MAX_MEMBER_BYTES} bytes.")
+            if written > budget: raise UploadError(f"Archive expands to more than {MAX_EXTRACTED_BYTES} bytes.")
+            if written > RATIO_CHECK_BYTES and written > MAX_COMPRESSION_RATIO * max(info.compress_size, 1):
+                raise UploadError(f"{info.filename} has a suspicious compression ratio.")
+            target.write(chunk)
+    return written
+
+def extract_translatable_members(archive, job_dir):
+    """
+    Extracts only the members the translator reads (see archive_member_parts) from a zip file
+    path or seekable stream. Audio, images and everything else are never inflated.
+    """
+    with zipfile.ZipFile(archive, 'r') as zip_ref:
+        members = zip_ref.infolist()
+        if len(members) > MAX_ARCHIVE_MEMBERS: raise UploadError(f"Archive has more than {MAX_ARCHIVE_MEMBERS} members.")
+        budget, extracted = MAX_EXTRACTED_BYTES, 0
+        for info in members:
+            if info.is_dir(): continue
+            parts = archive_member_parts(info.filename)
+            if parts is None: continue
+            target_path = os.path.join(job_dir, *parts)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            budget -= _extract_member(zip_ref, info, target_path, budget)
+            extracted += 1
+    return extracted
 
 def save_uploaded_file(file, job_id):
     job_dir = os.path.join(UPLOAD_FOLDER, job_id)
@@ -12,17 +71,25 @@ def save_uploaded_file(file, job_id):
     
     filename = secure_filename(file.filename)
     file_path = os.path.join(job_dir, filename)
-    file.save(file_path)
     
     print(f"Received file: {filename}")
 
     if filename.endswith('.zip'):
-        print("File is a ZIP archive. Extracting...")
-        with zipfile.ZipFile(file_path, 'r') as zip_ref:
-            zip_ref.extractall(job_dir)
-        os.remove(file_path)
-        print("Extraction complete.")
+        print("File is a ZIP archive. Extracting data files...")
+        # Uploads are spooled by the server already; read the archive from there when possible.
+        archive = file.stream if file.stream.seekable() else None
+        if archive is None:
+            file.save(file_path)
+            archive = file_path
+        try:
+            extracted = extract_translatable_members(archive, job_dir)
+        except zipfile.BadZipFile as e:
+            raise UploadError(f"Invalid ZIP archive: {e}")
+        finally:
+            if os.path.exists(file_path): os.remove(file_path)
+        print(f"Extraction complete ({extracted} files).")
     elif filename.endswith('.json'):
+        file.save(file_path)
         print("File is a single JSON. No extraction needed.")
     else:
         print("File is not a recognized ZIP or JSON. It will be ignored by the translation process.")
@@ -72,7 +139,8 @@ def get_rpgm_files(directory):
         print(f"Found {len(rpgm_files)} files in the root directory (likely a single file upload).")
         return rpgm_files
 
-    subdirs = [d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d))]
+    # Hidden folders (such as the originals kept by batch_translate --in-place) are not game folders
+    subdirs = [d for d in os.listdir(directory) if not d.startswith('.') and os.path.isdir(os.path.join(directory, d))]
     if len(subdirs) == 1:
         potential_game_dir = os.path.join(directory, subdirs[0])
         potential_data_dir = os.path.join(potential_game_dir, 'data')
@@ -91,16 +159,115 @@ def parse_json_file(file_path):
     with open(file_path, 'r', encoding='utf-8-sig') as f:
         return json.load(f)
 
-def save_json_file(data, file_path):
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def replace_file(file_path, write):
+    """Writes through write(f) into a temporary file and renames it over file_path, so hard links to the old file are left untouched."""
+    temporary_path = file_path + '.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        write(f)
+    os.replace(temporary_path, file_path)
+
+def save_json_file(data, file_path, output_format=None):
+    if (output_format or JSON_OUTPUT_FORMAT) == 'compact':
+        replace_file(file_path, lambda f: json.dump(data, f, ensure_ascii=False, separators=(',', ':')))
+    else:
+        replace_file(file_path, lambda f: json.dump(data, f, ensure_ascii=False, indent=2))
+
+def update_json_file(file_path, update):
+    """Parses a JSON file, lets update(data) change it in place and rewrites it. Returns what update returned."""
+    data = parse_json_file(file_path)
+    result = update(data)
+    save_json_file(data, file_path)
+    return result
+
+def read_json_text(file_path):
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        return f.read()
+
+def _skip_whitespace(text, position):
+    return JSON_WHITESPACE.match(text, position).end()
+
+def iter_json_array_items(text, key):
+    """
+    Yields (index, item, start, end) for each element of the array stored under `key` in a
+    top-level JSON object. Elements are decoded one at a time, so only one is alive at once;
+    text[start:end] is the element's source. Other top-level values are decoded and dropped.
+    """
+    position = _skip_whitespace(text, 0)
+    if text[position] != '{': raise ValueError("Expected a JSON object")
+    position = _skip_whitespace(text, position + 1)
+    while text[position] != '}':
+        name, position = scanstring(text, position + 1)
+        position = _skip_whitespace(text, position)
+        if text[position] != ':': raise ValueError(f"Expected ':' at offset {position}")
+        position = _skip_whitespace(text, position + 1)
+        if name == key and text[position] == '[':
+            position = _skip_whitespace(text, position + 1)
+            index = 0
+            while text[position] != ']':
+                item, end = json_decoder.raw_decode(text, position)
+                yield index, item, position, end
+                index += 1
+                position = _skip_whitespace(text, end)
+                if text[position] == ',': position = _skip_whitespace(text, position + 1)
+            return
+        _, position = json_decoder.raw_decode(text, position)
+        position = _skip_whitespace(text, position)
+        if text[position] == ',': position = _skip_whitespace(text, position + 1)
+
+class JsonItemPatches(dict):
+    """
+    New string values for a JSON file scanned with iter_json_array_items, keyed by their full
+    location (key, index, ...). `spans` maps each (key, index) item to its source span.
+    `splices` maps the location of a list to (index, count, items) triples: the `count` elements
+    at `index` are replaced with items after the values are set. Indexes and value locations refer
+    to the list as it is in the source.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.spans = {}
+        self.splices = {}
+
+    def splice(self, list_location, index, count, items):
+        self.splices.setdefault(list_location, []).append((index, count, items))
+
+    def clear(self):
+        super().clear()
+        self.splices.clear()
+
+def save_json_patches(patches, source_path, file_path):
+    """
+    Writes source_path to file_path, re-serializing only the array items that have patches
+    (in compact form, as RPG Maker writes them); every other byte is copied unchanged.
+    """
+    text = read_json_text(source_path)
+    by_item, splices_by_item = {}, {}
+    for location, value in patches.items():
+        by_item.setdefault(location[:2], []).append((location[2:], value))
+    for list_location, splices in patches.splices.items():
+        by_item.setdefault(list_location[:2], [])
+        splices_by_item.setdefault(list_location[:2], []).append((list_location[2:], splices))
+
+    pieces, position = [], 0
+    for item_key in sorted(by_item, key=lambda item_key: patches.spans[item_key]):
+        start, end = patches.spans[item_key]
+        item = json.loads(text[start:end])
+        for sub_path, value in by_item[item_key]:
+            container = item
+            for part in sub_path[:-1]: container = container[part]
+            container[sub_path[-1]] = value
+        for sub_path, splices in splices_by_item.get(item_key, []):
+            container = item
+            for part in sub_path: container = container[part]
+            # Last index first, so the source indexes of the others still hold.
+            for index, count, items in sorted(splices, key=lambda splice: splice[0], reverse=True):
+                container[index:index + count] = items
+        pieces.append(text[position:start])
+        pieces.append(json.dumps(item, ensure_ascii=False, separators=(',', ':')))
+        position = end
+    pieces.append(text[position:])
+    replace_file(file_path, lambda f: f.write(''.join(pieces)))
 
-def create_zip(translated_dir, job_id, filename="translated.zip"):
+def create_zip(translated_dir, job_id, filename="translated.zip", compression=None):
     zip_path = os.path.join(os.path.dirname(translated_dir), filename)
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(translated_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, translated_dir)
-                zipf.write(file_path, arcname)
-    return zip_path
\ No newline at end of file
+    return write_directory_zip(translated_dir, zip_path, compression)
\ No newline at end of file
@@ -0,0 +1,152 @@
+import os
+import uuid
+import socket
+import sqlite3
+import threading
+import time
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_QUEUE_PATH = os.environ.get('JOB_QUEUE_PATH', 'job_queue.sqlite3')
+POLL_INTERVAL = 1.0
+# A running job whose worker has not renewed its lease for this long is queued again.
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', 60))
+
+class JobScheduler:
+    """
+    Runs translation jobs on a fixed number of worker threads.
+    The queue lives in SQLite so queued (and interrupted) jobs are picked up again after a restart.
+    Several processes can share one queue: each running job holds a lease that its process renews
+    every third of JOB_LEASE_SECONDS, and only jobs whose lease ran out (their process died) are
+    queued again.
+    """
+
+    def __init__(self, run_job, workers=JOB_WORKERS, path=JOB_QUEUE_PATH, lease_seconds=JOB_LEASE_SECONDS):
+        self.run_job = run_job
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.threads = []
+
+        directory = os.path.dirname(path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'job_id TEXT PRIMARY KEY, target_language TEXT NOT NULL, source_language TEXT NOT NULL, '
+            'original_filename TEXT, project_id TEXT, state TEXT NOT NULL, enqueued_at REAL NOT NULL, '
+            'owner TEXT, lease_expires REAL)'
+        )
+        # Queues created before project_id or leases existed
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(jobs)')]
+        if 'project_id' not in columns: self.conn.execute('ALTER TABLE jobs ADD COLUMN project_id TEXT')
+        if 'owner' not in columns:
+            self.conn.execute('ALTER TABLE jobs ADD COLUMN owner TEXT')
+            self.conn.execute('ALTER TABLE jobs ADD COLUMN lease_expires REAL')
+
+    def start(self):
+        with self.lock:
+            if self.threads: return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, job_id, target_language, source_language, original_filename=None, project_id=None, on_queued=None):
+        """
+        Queues a job. Returns False if the same job_id is already queued or running.
+        on_queued runs inside the insert transaction, so no worker (of any process) can claim the
+        job before it returns, and the job is not queued if it raises.
+        """
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.execute(
+                    "INSERT INTO jobs (job_id, target_language, source_language, original_filename, project_id, state, enqueued_at) "
+                    "VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                    (job_id, target_language, source_language, original_filename, project_id, time.time())
+                )
+                if on_queued: on_queued()
+            except sqlite3.IntegrityError:
+                self.conn.execute('ROLLBACK')
+                return False
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            self.wakeup.notify()
+            return True
+
+    def depth(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'queued'").fetchone()[0]
+
+    def position(self, job_id):
+        """1-based position among queued jobs, 0 while running, None if the job is not in the queue."""
+        with self.lock:
+            row = self.conn.execute('SELECT state, enqueued_at FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if row is None: return None
+            if row[0] == 'running': return 0
+            ahead = self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND enqueued_at < ?", (row[1],)
+            ).fetchone()[0]
+            return ahead + 1
+
+    def _claim(self):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                self.conn.execute(
+                    "UPDATE jobs SET state = 'queued', owner = NULL, lease_expires = NULL "
+                    "WHERE state = 'running' AND COALESCE(lease_expires, 0) < ?", (now,)
+                )
+                row = self.conn.execute(
+                    "SELECT job_id, target_language, source_language, original_filename, project_id FROM jobs "
+                    "WHERE state = 'queued' ORDER BY enqueued_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute("UPDATE jobs SET state = 'running', owner = ?, lease_expires = ? WHERE job_id = ?",
+                                      (self.owner, now + self.lease_seconds, row[0]))
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            if row is None: self.wakeup.wait(POLL_INTERVAL)
+            return row
+
+    def _finish(self, job_id):
+        with self.lock:
+            self.conn.execute('DELETE FROM jobs WHERE job_id = ? AND owner = ?', (job_id, self.owner))
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                with self.lock:
+                    self.conn.execute("UPDATE jobs SET lease_expires = ? WHERE owner = ? AND state = 'running'",
+                                      (time.time() + self.lease_seconds, self.owner))
+            except Exception as e:
+                print(f"Job queue error: {e}")
+
+    def _worker(self):
+        while True:
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"Job queue error: {e}")
+                time.sleep(POLL_INTERVAL)
+                continue
+            if job is None: continue
+            job_id, target_language, source_language, original_filename, project_id = job
+            try:
+                self.run_job(job_id, target_language, source_language, original_filename, project_id)
+            except Exception as e:
+                print(f"Job {job_id} failed: {e}")
+            finally:
+                self._finish(job_id)
@@ -0,0 +1,412 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from translation_log import TranslationLog, load_record
+
+JOB_STORE = os.environ.get('JOB_STORE', 'sqlite')
+JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', 'job_state.sqlite3')
+JOB_STORE_URL = os.environ.get('JOB_STORE_URL', 'redis://localhost:6379/0')
+JOB_TTL = int(os.environ.get('JOB_TTL', 86400))
+LOG_FLUSH_INTERVAL = float(os.environ.get('JOB_LOG_FLUSH_INTERVAL', 2.0))
+FINAL_STATES = ('completed', 'error')
+
+class JobStore:
+    """
+    Job id -> status dict, shared by every thread (and, for the persistent stores, every process)
+    that serves the API. Each write pushes the job's expiry JOB_TTL seconds ahead; expired jobs
+    read as missing and are returned once by purge_expired() so their files can be removed.
+    A status's 'logs' is a TranslationLog; reads leave it out (and report its 'log_count') unless
+    they ask for it.
+    """
+    name = 'base'
+
+    def get(self, job_id, logs=False):
+        """The job's status, or None if it is unknown or expired. With logs, it includes its TranslationLog."""
+        raise NotImplementedError
+
+    def set(self, job_id, status):
+        """Replaces the job's status."""
+        raise NotImplementedError
+
+    def update(self, job_id, fields):
+        """Atomically merges fields into the job's status (creating it if needed)."""
+        raise NotImplementedError
+
+    def save_log_edits(self, job_id, log, positions):
+        """Stores records of the job's log that were changed in place (log being what get(logs=True) returned)."""
+        raise NotImplementedError
+
+    def delete(self, job_id):
+        raise NotImplementedError
+
+    def purge_expired(self):
+        """Drops expired jobs and returns their ids."""
+        raise NotImplementedError
+
+def _as_log(logs):
+    return logs if isinstance(logs, TranslationLog) else TranslationLog()
+
+class MemoryJobStore(JobStore):
+    """Per-process store; statuses (and their live TranslationLog) are kept as they are."""
+    name = 'memory'
+
+    def __init__(self, ttl=JOB_TTL):
+        self.ttl = ttl
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def get(self, job_id, logs=False):
+        entry = self.jobs.get(job_id)
+        if entry is None or entry[1] <= time.time(): return None
+        status = {key: value for key, value in entry[0].items() if key != 'logs'}
+        log = _as_log(entry[0].get('logs'))
+        status['log_count'] = len(log)
+        if logs: status['logs'] = log
+        return status
+
+    def set(self, job_id, status):
+        with self.lock: self.jobs[job_id] = (dict(status), time.time() + self.ttl)
+
+    def update(self, job_id, fields):
+        # Statuses are replaced, never mutated, so readers can iterate one without the lock.
+        with self.lock:
+            entry = self.jobs.get(job_id)
+            current = entry[0] if entry is not None and entry[1] > time.time() else {}
+            self.jobs[job_id] = ({**current, **fields}, time.time() + self.ttl)
+
+    def save_log_edits(self, job_id, log, positions):
+        pass  # the log that was edited is the stored one
+
+    def delete(self, job_id):
+        with self.lock: self.jobs.pop(job_id, None)
+
+    def purge_expired(self):
+        now = time.time()
+        with self.lock:
+            expired = [job_id for job_id, (_, expires_at) in self.jobs.items() if expires_at <= now]
+            for job_id in expired: del self.jobs[job_id]
+        return expired
+
+class SerializedJobStore(JobStore):
+    """
+    Base for stores that keep statuses outside the process. The status is stored as JSON next to
+    its log's length and generation; the log itself is a list of JSON chunks that is only
+    appended to: the records added since the last write ('append'), or records changed by an edit
+    ('edit'). A growing log is written at most every LOG_FLUSH_INTERVAL seconds while the job
+    runs and always once it is completed or failed. Replacing the log with another object starts
+    a new generation. Readers that want the log keep their copy and apply only newer chunks.
+    """
+
+    def __init__(self, ttl=JOB_TTL):
+        self.ttl = ttl
+        self.flushed = {}
+        self.loaded = {}
+        self.cache_lock = threading.Lock()
+
+    def _log_writes(self, job_id, status, replace, count, generation):
+        """
+        What a write of status does to the stored log, given its stored length and generation.
+        Returns (count, generation, reset, chunks): reset drops the chunks of older generations.
+        """
+        if 'logs' not in status:
+            if not replace: return count, generation, False, []
+            with self.cache_lock: self.flushed.pop(job_id, None)
+            return 0, generation + 1, True, []
+        log = _as_log(status['logs'])
+        final = status.get('status') in FINAL_STATES
+        now = time.time()
+        with self.cache_lock:
+            previous = self.flushed.get(job_id)
+            if previous is not None and previous[0] is log and previous[3] == generation:
+                if len(log) == previous[1] or (not final and now - previous[2] < LOG_FLUSH_INTERVAL):
+                    return count, generation, False, []
+                start, reset = previous[1], False
+            else:
+                start, reset, generation = 0, True, generation + 1
+            if final: self.flushed.pop(job_id, None)
+            else: self.flushed[job_id] = (log, len(log), now, generation)
+        chunks = [self._append_chunk(log, start)] if len(log) > start else []
+        return len(log), generation, reset, chunks
+
+    def _apply_chunks(self, job_id, generation, offset, chunks):
+        """
+        Applies the chunks of a generation read from position `offset` on (see _seen) to this
+        process's copy of the job's log and returns it.
+        """
+        with self.cache_lock:
+            cached = self.loaded.get(job_id)
+            log = cached[1] if cached is not None and cached[0] == generation else TranslationLog()
+            seen = cached[2] if cached is not None and cached[0] == generation else 0
+            # Another thread may have applied some of them since they were read.
+            for chunk in chunks[max(seen - offset, 0):] if seen >= offset else []:
+                kind, payload = json.loads(chunk)
+                if kind == 'append':
+                    start, records, segments = payload
+                    log.append_tail((start, [load_record(fields) for fields in records], [tuple(segment) for segment in segments]))
+                else:
+                    for position, fields in payload: log.records[position] = load_record(fields)
+                seen += 1
+            self.loaded[job_id] = (generation, log, seen)
+        return log
+
+    def _seen(self, job_id, generation):
+        """How many chunks of this generation the cached copy of the job's log has applied."""
+        with self.cache_lock:
+            cached = self.loaded.get(job_id)
+            return cached[2] if cached is not None and cached[0] == generation else 0
+
+    @staticmethod
+    def _append_chunk(log, start):
+        start, records, segments = log.tail(start)
+        return json.dumps(['append', [start, records, segments]], ensure_ascii=False)
+
+    @staticmethod
+    def _edit_chunk(log, positions):
+        return json.dumps(['edit', [[position, log.records[position]] for position in positions]], ensure_ascii=False)
+
+    @staticmethod
+    def _decode(status_json, count):
+        status = json.loads(status_json)
+        status['log_count'] = count
+        return status
+
+    @staticmethod
+    def _encode(status):
+        return json.dumps({key: value for key, value in status.items() if key not in ('logs', 'log_count')})
+
+    def _forget(self, job_ids):
+        with self.cache_lock:
+            for job_id in job_ids:
+                self.flushed.pop(job_id, None)
+                self.loaded.pop(job_id, None)
+
+class SQLiteJobStore(SerializedJobStore):
+    """Statuses in an SQLite (WAL) file, shared by all worker processes on the host."""
+    name = 'sqlite'
+
+    def __init__(self, path=JOB_STORE_PATH, ttl=JOB_TTL):
+        super().__init__(ttl)
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS job_state ('
+            'job_id TEXT PRIMARY KEY, status TEXT NOT NULL, log_count INTEGER NOT NULL DEFAULT 0, '
+            'log_generation INTEGER NOT NULL DEFAULT 0, expires_at REAL NOT NULL)'
+        )
+        # Stores created when the whole log was one pickle in job_state
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(job_state)')]
+        if 'log_count' not in columns:
+            self.conn.execute('ALTER TABLE job_state ADD COLUMN log_count INTEGER NOT NULL DEFAULT 0')
+            self.conn.execute('ALTER TABLE job_state ADD COLUMN log_generation INTEGER NOT NULL DEFAULT 0')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS job_state_expires_at ON job_state (expires_at)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS job_log ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, generation INTEGER NOT NULL, chunk TEXT NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS job_log_job_id ON job_log (job_id, generation, id)')
+        # Logs written as pickled chunks are not read back: those jobs keep their status without a log.
+        self.conn.execute("UPDATE job_state SET log_count = 0, log_generation = log_generation + 1 "
+                          "WHERE job_id IN (SELECT job_id FROM job_log WHERE typeof(chunk) = 'blob')")
+        self.conn.execute("DELETE FROM job_log WHERE typeof(chunk) = 'blob'")
+
+    def get(self, job_id, logs=False):
+        with self.lock:
+            # One read transaction, so the log chunks match the status they are read with.
+            self.conn.execute('BEGIN')
+            try:
+                row = self.conn.execute(
+                    'SELECT status, log_count, log_generation FROM job_state WHERE job_id = ? AND expires_at > ?', (job_id, time.time())
+                ).fetchone()
+                chunks = None
+                if row is not None and logs:
+                    offset = self._seen(job_id, row[2])
+                    chunks = [chunk for chunk, in self.conn.execute(
+                        'SELECT chunk FROM job_log WHERE job_id = ? AND generation = ? ORDER BY id LIMIT -1 OFFSET ?',
+                        (job_id, row[2], offset))]
+            finally:
+                self.conn.execute('COMMIT')
+        if row is None: return None
+        status = self._decode(row[0], row[1])
+        if chunks is not None:
+            status['logs'] = self._apply_chunks(job_id, row[2], offset, chunks)
+            status['log_count'] = len(status['logs'])
+        return status
+
+    def _write(self, job_id, status, replace):
+        row = self.conn.execute('SELECT log_count, log_generation FROM job_state WHERE job_id = ?', (job_id,)).fetchone()
+        count, generation, reset, chunks = self._log_writes(job_id, status, replace, *(row or (0, 0)))
+        if reset: self.conn.execute('DELETE FROM job_log WHERE job_id = ?', (job_id,))
+        self.conn.executemany('INSERT INTO job_log (job_id, generation, chunk) VALUES (?, ?, ?)',
+                              [(job_id, generation, chunk) for chunk in chunks])
+        self.conn.execute(
+            'INSERT INTO job_state (job_id, status, log_count, log_generation, expires_at) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(job_id) DO UPDATE SET status = excluded.status, log_count = excluded.log_count, '
+            'log_generation = excluded.log_generation, expires_at = excluded.expires_at',
+            (job_id, self._encode(status), count, generation, time.time() + self.ttl)
+        )
+
+    def _transaction(self, write):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = write()
+                self.conn.execute('COMMIT')
+                return result
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def set(self, job_id, status):
+        self._transaction(lambda: self._write(job_id, status, replace=True))
+
+    def update(self, job_id, fields):
+        def merge():
+            row = self.conn.execute(
+                'SELECT status FROM job_state WHERE job_id = ? AND expires_at > ?', (job_id, time.time())
+            ).fetchone()
+            status = json.loads(row[0]) if row is not None else {}
+            status.update(fields)
+            self._write(job_id, status, replace=row is None)
+        self._transaction(merge)
+
+    def save_log_edits(self, job_id, log, positions):
+        def append():
+            row = self.conn.execute('SELECT log_generation FROM job_state WHERE job_id = ?', (job_id,)).fetchone()
+            if row is None: return
+            self.conn.execute('INSERT INTO job_log (job_id, generation, chunk) VALUES (?, ?, ?)',
+                              (job_id, row[0], self._edit_chunk(log, positions)))
+            self.conn.execute('UPDATE job_state SET expires_at = ? WHERE job_id = ?', (time.time() + self.ttl, job_id))
+        self._transaction(append)
+
+    def delete(self, job_id):
+        def remove():
+            self.conn.execute('DELETE FROM job_state WHERE job_id = ?', (job_id,))
+            self.conn.execute('DELETE FROM job_log WHERE job_id = ?', (job_id,))
+        self._transaction(remove)
+        self._forget([job_id])
+
+    def purge_expired(self):
+        def remove():
+            now = time.time()
+            expired = [row[0] for row in self.conn.execute('SELECT job_id FROM job_state WHERE expires_at <= ?', (now,))]
+            self.conn.execute('DELETE FROM job_state WHERE expires_at <= ?', (now,))
+            self.conn.executemany('DELETE FROM job_log WHERE job_id = ?', [(job_id,) for job_id in expired])
+            return expired
+        expired = self._transaction(remove)
+        self._forget(expired)
+        return expired
+
+class RedisJobStore(SerializedJobStore):
+    """
+    Statuses in a Redis-compatible server, shared across hosts. Each job is a hash, and each
+    generation of its log a list of chunks, that expire natively; a sorted set of expiry times
+    lets purge_expired() report which jobs went away.
+    Any client with the redis-py interface works, e.g. fakeredis.FakeRedis() for local runs.
+    """
+    name = 'redis'
+
+    def __init__(self, client=None, url=JOB_STORE_URL, ttl=JOB_TTL, prefix='rpgm:'):
+        super().__init__(ttl)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.expiry_key = f'{prefix}job_expiry'
+
+    def _key(self, job_id):
+        return f'{self.prefix}job:{job_id}'
+
+    def _log_key(self, job_id, generation):
+        return f'{self.prefix}job_log:{job_id}:{generation}'
+
+    def get(self, job_id, logs=False):
+        status_json, count, generation = self.client.hmget(self._key(job_id), 'status', 'log_count', 'log_generation')
+        if status_json is None: return None
+        status = self._decode(status_json, int(count or 0))
+        if logs:
+            generation = int(generation or 0)
+            offset = self._seen(job_id, generation)
+            chunks = self.client.lrange(self._log_key(job_id, generation), offset, -1)
+            status['logs'] = self._apply_chunks(job_id, generation, offset, chunks)
+            status['log_count'] = len(status['logs'])
+        return status
+
+    def _write(self, pipe, job_id, status, replace, count, generation):
+        key = self._key(job_id)
+        new_count, new_generation, reset, chunks = self._log_writes(job_id, status, replace, count, generation)
+        log_key = self._log_key(job_id, new_generation)
+        pipe.multi()
+        if reset: pipe.delete(self._log_key(job_id, generation))
+        if chunks: pipe.rpush(log_key, *chunks)
+        pipe.hset(key, mapping={'status': self._encode(status), 'log_count': new_count, 'log_generation': new_generation})
+        pipe.expire(key, self.ttl)
+        pipe.expire(log_key, self.ttl)
+        pipe.zadd(self.expiry_key, {job_id: time.time() + self.ttl})
+
+    def set(self, job_id, status):
+        def replace(pipe):
+            count, generation = pipe.hmget(self._key(job_id), 'log_count', 'log_generation')
+            self._write(pipe, job_id, status, True, int(count or 0), int(generation or 0))
+        self.client.transaction(replace, self._key(job_id))
+
+    def update(self, job_id, fields):
+        def merge(pipe):
+            status_json, count, generation = pipe.hmget(self._key(job_id), 'status', 'log_count', 'log_generation')
+            status = json.loads(status_json) if status_json is not None else {}
+            status.update(fields)
+            self._write(pipe, job_id, status, status_json is None, int(count or 0), int(generation or 0))
+        self.client.transaction(merge, self._key(job_id))
+
+    def save_log_edits(self, job_id, log, positions):
+        def append(pipe):
+            generation = pipe.hget(self._key(job_id), 'log_generation')
+            if generation is None: return
+            log_key = self._log_key(job_id, int(generation))
+            pipe.multi()
+            pipe.rpush(log_key, self._edit_chunk(log, positions))
+            pipe.expire(self._key(job_id), self.ttl)
+            pipe.expire(log_key, self.ttl)
+            pipe.zadd(self.expiry_key, {job_id: time.time() + self.ttl})
+        self.client.transaction(append, self._key(job_id))
+
+    def _remove(self, job_id):
+        generation = self.client.hget(self._key(job_id), 'log_generation')
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(job_id))
+        if generation is not None: pipe.delete(self._log_key(job_id, int(generation)))
+        pipe.execute()
+
+    def delete(self, job_id):
+        self._remove(job_id)
+        self.client.zrem(self.expiry_key, job_id)
+        self._forget([job_id])
+
+    def purge_expired(self):
+        expired = []
+        for job_id in self.client.zrangebyscore(self.expiry_key, 0, time.time()):
+            # Only the client whose ZREM succeeds reports the job.
+            if self.client.zrem(self.expiry_key, job_id):
+                job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+                self._remove(job_id)
+                expired.append(job_id)
+        self._forget(expired)
+        return expired
+
+JOB_STORES = {
+    'memory': MemoryJobStore,
+    'sqlite': SQLiteJobStore,
+    'redis': RedisJobStore,
+}
+
+def create_job_store(name=None):
+    """Builds the store selected by JOB_STORE."""
+    name = name or JOB_STORE
+    if name not in JOB_STORES: raise ValueError(f"Unknown job store '{name}'. Available: {', '.join(JOB_STORES)}")
+    return JOB_STORES[name]()
@@ -0,0 +1,127 @@
+import time
+import threading
+from contextlib import contextmanager
+from bisect import bisect_left
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.lock = threading.Lock()
+
+    def _label_text(self, values, extra=None):
+        pairs = list(zip(self.labels, values))
+        if extra: pairs.append(extra)
+        if not pairs: return ''
+        return '{' + ','.join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + '}'
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}'] + self.samples()
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self.lock: self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self.lock: values = dict(self.values)
+        return [f'{self.name}{self._label_text(key)} {value}' for key, value in sorted(values.items())]
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram; observe() is a bisect and a few additions under a lock."""
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None: series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self.lock: series = {key: (list(counts), total, count) for key, (counts, total, count) in self.series.items()}
+        lines = []
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append(f'{self.name}_bucket{self._label_text(key, ("le", le))} {cumulative}')
+            lines.append(f'{self.name}_sum{self._label_text(key)} {total}')
+            lines.append(f'{self.name}_count{self._label_text(key)} {count}')
+        return lines
+
+class Gauge(Metric):
+    """Gauge read from a callback when the metrics are scraped."""
+    type = 'gauge'
+
+    def __init__(self, name, help, read):
+        super().__init__(name, help)
+        self.read = read
+
+    def samples(self):
+        try: return [f'{self.name} {self.read()}']
+        except Exception as e:
+            print(f"Could not read gauge {self.name}: {e}")
+            return []
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values(): lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+JOBS = registry.register(Counter('rpgm_jobs_total', 'Translation jobs finished, by final status.', ('status',)))
+STAGE_SECONDS = registry.register(Histogram('rpgm_stage_seconds', 'Time spent in each stage of a job.', ('stage',)))
+FILE_SECONDS = registry.register(Histogram('rpgm_file_seconds', 'Time spent extracting and writing one file.', ('kind',)))
+BACKEND_REQUEST_SECONDS = registry.register(Histogram('rpgm_backend_request_seconds', 'Latency of translation backend requests.', ('backend', 'outcome')))
+RETRIES = registry.register(Counter('rpgm_backend_retries_total', 'Backend requests retried after an error.', ('backend',)))
+FAILED_STRINGS = registry.register(Counter('rpgm_failed_strings_total', 'Strings left untranslated after all retries.'))
+CACHE_LOOKUPS = registry.register(Counter('rpgm_cache_lookups_total', 'Translation memory lookups, by result.', ('result',)))
+
+class StageTimer:
+    """Accumulates seconds per stage for one job; finish() reports each stage to STAGE_SECONDS."""
+
+    def __init__(self):
+        self.seconds = {}
+
+    def add(self, stage, seconds):
+        self.seconds[stage] = round(self.seconds.get(stage, 0) + seconds, 4)
+
+    @contextmanager
+    def stage(self, stage):
+        started = time.perf_counter()
+        try: yield
+        finally: self.add(stage, time.perf_counter() - started)
+
+    def finish(self):
+        for stage, seconds in self.seconds.items(): STAGE_SECONDS.observe(seconds, stage)
@@ -1,25 +1,92 @@
+import re
+import unicodedata
+
+# RPG Maker MV/MZ control codes (\C[2], \N[1], \V[3], \G, \{, \!, ...) take up no room in the
+# message window; an escaped backslash (\\) is drawn as one character.
+ESCAPE_CODE = re.compile(r'\\(?:[A-Za-z]+(?:\[[^\]]*\])?|[{}$.|!<>^])')
+TOKEN = re.compile(ESCAPE_CODE.pattern + r'|\\\\|.', re.DOTALL)
+
+def _char_width(char):
+    if unicodedata.category(char) in ('Mn', 'Me', 'Cf') or char in '\u200b\u200c\u200d': return 0
+    if unicodedata.east_asian_width(char) in ('W', 'F'): return 2
+    return 1
+
+# Display width of every BMP character, in half-width cells; other planes are looked up on demand.
+BMP_WIDTHS = bytes(_char_width(chr(code)) if not 0xD800 <= code <= 0xDFFF else 1 for code in range(0x10000))
+
+def char_width(char):
+    code = ord(char)
+    return BMP_WIDTHS[code] if code < 0x10000 else _char_width(char)
+
+def display_width(text):
+    """Width of text in half-width cells: full-width (CJK) characters count 2, control codes 0."""
+    if text.isascii() and '\\' not in text: return len(text)
+    if '\\' in text: text = ESCAPE_CODE.sub('', text).replace('\\\\', '\\')
+    if text.isascii(): return len(text)
+    return sum(BMP_WIDTHS[code] if code < 0x10000 else _char_width(chr(code)) for code in map(ord, text))
+
+def _split_wide_word(word, max_len):
+    """Breaks a word containing full-width characters between characters (control codes stay whole)."""
+    pieces, current, width = [], [], 0
+    for token in TOKEN.findall(word):
+        token_width = display_width(token)
+        if current and width + token_width > max_len:
+            pieces.append(''.join(current))
+            current, width = [], 0
+        current.append(token)
+        width += token_width
+    if current: pieces.append(''.join(current))
+    return pieces
+
 def print_neatly(text, max_len=55):
     """
-    Splits a long string into a list of strings, each not exceeding max_len.
-    Tries to split at spaces to avoid breaking words.
+    Splits a long string into a list of strings whose display width does not exceed max_len.
+    Splits at spaces to avoid breaking words; words wider than a line stay whole unless they
+    contain full-width characters, which may be broken anywhere.
     """
     if not text:
         return [""]
-    
-    words = text.split(' ')
+    if display_width(text) <= max_len:
+        return [text]
+
     lines = []
     current_line = []
-    
-    for word in words:
-        temp_line = ' '.join(current_line + [word])
-        if len(temp_line) <= max_len:
+    current_width = 0
+
+    for word in text.split(' '):
+        word_width = display_width(word)
+        if current_line and current_width + 1 + word_width <= max_len:
             current_line.append(word)
-        else:
-            if current_line:
-                lines.append(' '.join(current_line))
-            current_line = [word]
-            
+            current_width += 1 + word_width
+            continue
+        if current_line:
+            lines.append(' '.join(current_line))
+        if word_width > max_len and not word.isascii():
+            *full_lines, word = _split_wide_word(word, max_len)
+            lines.extend(full_lines)
+            word_width = display_width(word)
+        current_line = [word]
+        current_width = word_width
+
     if current_line:
         lines.append(' '.join(current_line))
-        
-    return lines
\ No newline at end of file
+
+    return lines
+
+def print_neatly_batch(texts, max_len=55):
+    """print_neatly for many strings at once; returns one list of lines per text (repeated texts are wrapped once)."""
+    wrapped = {}
+    for text in texts:
+        if text not in wrapped: wrapped[text] = print_neatly(text, max_len)
+    return [wrapped[text] for text in texts]
+
+def reflow_lines(lines, max_len=55, max_lines=None):
+    """
+    Joins the lines of one message block and wraps them again to max_len. With max_lines the
+    result has exactly that many lines: short blocks are padded with empty lines and whatever
+    does not fit stays on the last line.
+    """
+    reflowed = print_neatly(' '.join(line.strip() for line in lines if line.strip()), max_len)
+    if max_lines is None: return reflowed
+    if len(reflowed) > max_lines: reflowed = reflowed[:max_lines - 1] + [' '.join(reflowed[max_lines - 1:])]
+    return reflowed + [''] * (max_lines - len(reflowed))
@@ -0,0 +1,190 @@
+import os
+import json
+import shutil
+import sqlite3
+import hashlib
+from werkzeug.utils import secure_filename # pyright: ignore[reportMissingImports]
+from translation_log import TranslationLog, load_record
+
+PROJECTS_FOLDER = os.environ.get('PROJECTS_FOLDER', 'projects')
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def text_digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+def link_or_copy(source, destination):
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    if os.path.exists(destination): os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+class ProjectManifest:
+    """
+    What the previous run of a project produced: the content hash, translated output, log records
+    and string hashes of every source file, plus the translation of every string. Lets a re-upload skip
+    unchanged files and send only new strings to the translator.
+    Entries live in one SQLite table row per file (and per string), so an edit or a run rewrites
+    only the rows it changes; concurrent jobs and edits are serialized by SQLite transactions.
+    Outputs are stored under the hash of their source file, so runs that share a project id but
+    not a game never hand each other a wrong file. Each backend keeps its own manifest of a project.
+    A project_id of None disables the manifest.
+    """
+
+    def __init__(self, project_id, backend_name, source_language, target_language, folder=PROJECTS_FOLDER):
+        self.files = {}
+        self.new_files = {}
+        self.new_strings = {}
+        self.directory = None
+        self.conn = None
+        if project_id is None: return
+        key = secure_filename(f"{project_id}_{backend_name}_{source_language}_{target_language}") or 'project'
+        self.directory = os.path.join(folder, key)
+        self.output_dir = os.path.join(self.directory, 'translated')
+        self.path = os.path.join(self.directory, 'manifest.sqlite3')
+        os.makedirs(self.directory, exist_ok=True)
+        # Manifests written as one JSON document are dropped; their files are translated again once.
+        if os.path.exists(os.path.join(self.directory, 'manifest.json')): os.remove(os.path.join(self.directory, 'manifest.json'))
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'relative_path TEXT PRIMARY KEY, hash TEXT NOT NULL, translated INTEGER NOT NULL, '
+            'complete INTEGER NOT NULL, translations INTEGER NOT NULL, strings TEXT NOT NULL, log TEXT)'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS strings (hash TEXT PRIMARY KEY, translation TEXT NOT NULL)')
+        for relative_path, digest, translated, complete, translations, has_log in self.conn.execute(
+                'SELECT relative_path, hash, translated, complete, translations, log IS NOT NULL FROM files'):
+            self.files[relative_path] = {'hash': digest, 'translated': bool(translated), 'complete': bool(complete),
+                                         'translations': translations, 'has_log': bool(has_log)}
+
+    def close(self):
+        if self.conn is not None: self.conn.close()
+        self.conn = None
+
+    def stored_path(self, digest):
+        return os.path.join(self.output_dir, digest[:2], digest)
+
+    def unchanged(self, relative_path, digest):
+        entry = self.files.get(relative_path)
+        if entry is None or entry['hash'] != digest or not entry['complete']: return False
+        return not entry['translated'] or (entry['has_log'] and os.path.exists(self.stored_path(digest)))
+
+    def reuse_output(self, relative_path, translated_file_path):
+        """Links (or copies) the previous translated output into this job. Returns that file's translation count."""
+        entry = self.new_files[relative_path] = {**self.files[relative_path], 'reused': True}
+        if entry['translated']: link_or_copy(self.stored_path(entry['hash']), translated_file_path)
+        return entry['translations']
+
+    def reused_log(self, relative_path, file_name, output_relative_path):
+        """A TranslationLog with the records the previous run logged for a reused file."""
+        log = TranslationLog()
+        log.begin_file(file_name, output_relative_path)
+        row = self.conn.execute('SELECT log FROM files WHERE relative_path = ?', (relative_path,)).fetchone()
+        for fields in json.loads(row[0]) if row and row[0] else []: log.records.append(load_record(fields))
+        return log
+
+    def known_translation(self, text):
+        if self.conn is None: return None
+        text_hash = text_digest(text)
+        if text_hash in self.new_strings: return self.new_strings[text_hash]
+        row = self.conn.execute('SELECT translation FROM strings WHERE hash = ?', (text_hash,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, relative_path, digest, texts=None, results=None, translations=0, translated_file_path=None, log=None):
+        """
+        Remembers a freshly processed file: its hash, its strings' translations, the records of its
+        TranslationLog and a copy of the output. Files that are not translated at all are recorded
+        without texts or output.
+        """
+        if self.directory is None: return
+        if translated_file_path is None:
+            self.new_files[relative_path] = {'hash': digest, 'translated': False, 'complete': True, 'translations': 0,
+                                             'strings': [], 'log': None}
+            return
+        hashes, complete = [], True
+        for text in dict.fromkeys(texts):
+            translation, success = results[text]
+            if not success:
+                complete = False
+                continue
+            text_hash = text_digest(text)
+            self.new_strings[text_hash] = translation
+            hashes.append(text_hash)
+        self.new_files[relative_path] = {'hash': digest, 'translated': True, 'complete': complete,
+                                        'translations': translations, 'strings': hashes,
+                                        'log': [list(record) for record in log.records] if log is not None else []}
+        link_or_copy(translated_file_path, self.stored_path(digest))
+
+    def save(self):
+        """
+        Writes the rows of the files this run recorded and drops the files it did not see; reused
+        files keep their rows untouched. Strings no file references any more are dropped, and so are
+        stored outputs no file uses.
+        """
+        if self.directory is None: return
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            stale = [(relative_path,) for relative_path, in self.conn.execute('SELECT relative_path FROM files')
+                     if relative_path not in self.new_files]
+            self.conn.executemany('DELETE FROM files WHERE relative_path = ?', stale)
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO files (relative_path, hash, translated, complete, translations, strings, log) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(relative_path, entry['hash'], entry['translated'], entry['complete'], entry['translations'],
+                  json.dumps(entry['strings']), json.dumps(entry['log'], ensure_ascii=False) if entry['log'] is not None else None)
+                 for relative_path, entry in self.new_files.items() if not entry.get('reused')]
+            )
+            self.conn.executemany('INSERT OR REPLACE INTO strings (hash, translation) VALUES (?, ?)', self.new_strings.items())
+
+            referenced = set()
+            for strings, in self.conn.execute('SELECT strings FROM files'): referenced.update(json.loads(strings))
+            self.conn.executemany('DELETE FROM strings WHERE hash = ?',
+                                  [(text_hash,) for text_hash, in self.conn.execute('SELECT hash FROM strings').fetchall()
+                                   if text_hash not in referenced])
+
+            stored = {digest for digest, in self.conn.execute('SELECT hash FROM files WHERE translated')}
+            for root, dirs, files in os.walk(self.output_dir, topdown=False):
+                for file in files:
+                    if file not in stored: os.remove(os.path.join(root, file))
+                if root != self.output_dir and not os.listdir(root): os.rmdir(root)
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+        self.new_strings = {}
+
+    def apply_edit(self, relative_path, digest, translated_file_path, records, edited):
+        """
+        Takes over an edit of a job's output, given all the LogRecords of the file after the edit
+        (an edit may move the locations of other records) and the edited ones. If the manifest still
+        holds that file (same source hash), the edited file becomes the stored output, its records
+        replace the stored ones and the edited strings' translations are updated. Returns False
+        otherwise. Only that file's row and the edited strings are rewritten.
+        """
+        if self.directory is None: return False
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute('SELECT hash, translated FROM files WHERE relative_path = ?', (relative_path,)).fetchone()
+            if row is None or row[0] != digest or not row[1]:
+                self.conn.execute('ROLLBACK')
+                return False
+            self.conn.execute('UPDATE files SET log = ? WHERE relative_path = ?',
+                              (json.dumps([list(record) for record in records], ensure_ascii=False), relative_path))
+            for record in edited:
+                # Message blocks are rewrapped when their translation is used again.
+                translated = ' '.join(line.strip() for line in record.translated.split('\n') if line.strip()) if record.width else record.translated
+                self.conn.execute('INSERT OR REPLACE INTO strings (hash, translation) VALUES (?, ?)', (text_digest(record.raw), translated))
+            link_or_copy(translated_file_path, self.stored_path(digest))
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+        return True
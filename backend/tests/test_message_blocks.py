@@ -0,0 +1,183 @@
+"""
+Checks that message blocks are rewrapped over the right number of 401 commands, that every logged
+location points at what was written (also after edits) and that the source can be restored
+between languages, for parsed and streamed maps.
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# translator picks its backend, job store and translation memory when it is imported.
+os.environ.setdefault('TRANSLATION_BACKEND', 'mock')
+os.environ.setdefault('JOB_STORE', 'memory')
+os.environ.setdefault('TRANSLATION_CACHE_PATH', ':memory:')
+
+from translator import (extract_dialog_units, extract_dialog_units_streaming, apply_units, apply_edits, restore_units,
+                        MESSAGE_LINE_WIDTH)
+from translation_log import TranslationLog
+from file_handler import save_json_patches, parse_json_file, update_json_file
+
+LONG = ' '.join(['parola'] * 24)  # three lines at MESSAGE_LINE_WIDTH
+
+def page(*commands):
+    return [{'code': code, 'indent': 0, 'parameters': list(parameters)} for code, *parameters in commands] + \
+           [{'code': 0, 'indent': 0, 'parameters': []}]
+
+def map_data():
+    # Two overflowing blocks and one that shrinks in the same list, with a choice after each.
+    first = page((101, '', 0, 0, 2), (401, 'uno'), (102, ['Si', 'No'], 1),
+                 (401, 'due'), (401, 'tre'), (401, 'quattro'), (102, ['Si', 'No'], 1),
+                 (401, 'cinque'), (102, ['Si', 'No'], 1))
+    second = page((401, 'sei'), (401, 'sette'))
+    return {'events': [None, {'id': 1, 'name': 'EV001', 'pages': [{'list': first}]}, None,
+                       {'id': 3, 'name': 'EV003', 'pages': [{'list': second}]}]}
+
+RESULTS = {'uno': (LONG, True), 'due tre quattro': ('short', True), 'cinque': (LONG + ' fine', True),
+           'sei sette': ('six seven', True), 'Si': ('Yes', True), 'No': ('No', True)}
+
+def value_at(data, location):
+    for part in location: data = data[part]
+    return data
+
+def codes(data, event):
+    return [command['code'] for command in data['events'][event]['pages'][0]['list']]
+
+class MessageBlockTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertLocations(self, data, log):
+        """Every logged location holds the logged translation; blocks have one 401 per line."""
+        for record in log.records:
+            if record.location is None: continue
+            if isinstance(record.location[0], tuple):
+                self.assertEqual('\n'.join(value_at(data, line) for line in record.location), record.translated)
+                for line in record.location: self.assertEqual(value_at(data, line[:-2])['code'], 401)
+            else: self.assertEqual(value_at(data, record.location), record.translated)
+
+    def assertTranslated(self, data, log):
+        self.assertLocations(data, log)
+        self.assertEqual(codes(data, 1), [101, 401, 401, 401, 102, 401, 102, 401, 401, 401, 401, 102, 0])
+        self.assertEqual(codes(data, 3), [401, 0])
+        for record in log.records:
+            self.assertNotIn('\n\n', record.translated)
+            self.assertFalse(record.translated.endswith('\n'))
+
+    def edit(self, data, log):
+        blocks = [n for n, record in enumerate(log.records) if isinstance(record.location[0], tuple)]
+        choice = next(n for n, record in enumerate(log.records) if record.translated == 'Yes')
+        # The first block loses two lines, the second gains one and the records after them move.
+        self.edited = {blocks[0]: 'A', choice: 'Sure', blocks[1]: 'one\ntwo'}
+        return apply_edits(data, log, dict(self.edited))
+
+    def assertEdited(self, data, log, changed):
+        self.assertLocations(data, log)
+        self.assertEqual(codes(data, 1), [101, 401, 102, 401, 401, 102, 401, 401, 401, 401, 102, 0])
+        self.assertEqual({n: log.records[n].translated for n in self.edited}, self.edited)
+        # Every record of the first event moved or changed; the block of the other event did not.
+        self.assertEqual(changed, list(range(len(log.records) - 1)))
+
+    def test_parsed_map(self):
+        data = map_data()
+        units = extract_dialog_units(data)
+        self.assertEqual(sum(1 for unit in units if 'lines' in unit), 4)
+        log = TranslationLog()
+        self.assertEqual(apply_units(units, RESULTS, log, 'Map001.json', 'data/Map001.json', data), 10)
+        self.assertTranslated(data, log)
+        self.assertTrue(all(len(line) <= MESSAGE_LINE_WIDTH for line in log.records[0].translated.split('\n')))
+        self.assertEdited(data, log, self.edit(data, log))
+
+    def test_streamed_map(self):
+        source = os.path.join(self.directory, 'Map001.json')
+        output = os.path.join(self.directory, 'Map001.translated.json')
+        with open(source, 'w', encoding='utf-8') as f: json.dump(map_data(), f, indent=2)
+        with open(source, 'r', encoding='utf-8') as f: units, patches = extract_dialog_units_streaming(f.read())
+        log = TranslationLog()
+        apply_units(units, RESULTS, log, 'Map001.json', 'data/Map001.json', patches)
+        save_json_patches(patches, source, output)
+        self.assertTranslated(parse_json_file(output), log)
+        changed = update_json_file(output, lambda data: self.edit(data, log))
+        self.assertEdited(parse_json_file(output), log, changed)
+
+    def test_restore_between_languages(self):
+        data = map_data()
+        units = extract_dialog_units(data)
+        apply_units(units, RESULTS, TranslationLog(), data=data)
+        restore_units(units, data)
+        self.assertEqual(data, map_data())
+
+        french = {text: ('fr ' + text, True) for text in RESULTS}
+        french['uno'] = (LONG + ' ' + LONG, True)
+        log = TranslationLog()
+        apply_units(units, french, log, data=data)
+        self.assertLocations(data, log)
+        self.assertEqual(codes(data, 1)[:7], [101, 401, 401, 401, 401, 401, 401])
+        restore_units(units, data)
+        self.assertEqual(data, map_data())
+
+    def test_streamed_restore_between_languages(self):
+        source = os.path.join(self.directory, 'Map001.json')
+        with open(source, 'w', encoding='utf-8') as f: json.dump(map_data(), f)
+        with open(source, 'r', encoding='utf-8') as f: units, patches = extract_dialog_units_streaming(f.read())
+        for language in ('en', 'fr'):
+            results = RESULTS if language == 'en' else {text: (f'{language} {text}', True) for text in RESULTS}
+            restore_units(units, patches)
+            log = TranslationLog()
+            apply_units(units, results, log, data=patches)
+            output = os.path.join(self.directory, f'{language}.json')
+            save_json_patches(patches, source, output)
+            self.assertLocations(parse_json_file(output), log)
+        self.assertEqual(codes(parse_json_file(output), 1), [101, 401, 102, 401, 102, 401, 102, 0])
+
+class StreamedRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, 'Map002.json')
+        # Spacing, key order and escapes that a re-serialization would not reproduce.
+        self.text = ('{\n  "autoplayBgm" : false,"displayName":"Città \\u00e8",\n  "events": [ null,\n'
+                     '    {"id":1, "name":"EV001", "pages":[{"list":[{"code":401,"indent":0,"parameters":["ciao"]},{"code":0,"indent":0,"parameters":[]}]}]},\n'
+                     '    {"id" : 2,"name":"EV002","pages":[{"list":[{"code":401,"indent":0,"parameters":["addio \\"amico\\""]},'
+                     '{"code":0,"indent":0,"parameters":[]}]}], "note": "\u00e9\\n"}\n  ],\n  "height": 13 }\n')
+        with open(self.source, 'w', encoding='utf-8') as f: f.write(self.text)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, file_path):
+        with open(file_path, 'rb') as f: return f.read()
+
+    def test_untouched_file_is_copied_byte_for_byte(self):
+        units, patches = extract_dialog_units_streaming(self.text)
+        self.assertEqual(len(units), 2)
+        output = os.path.join(self.directory, 'out.json')
+        # A failed translation leaves the file as it was.
+        apply_units(units, {unit['raw']: (unit['raw'], False) for unit in units}, TranslationLog(), data=patches)
+        save_json_patches(patches, self.source, output)
+        self.assertEqual(self.read(output), self.read(self.source))
+
+    def test_only_patched_events_are_rewritten(self):
+        units, patches = extract_dialog_units_streaming(self.text)
+        output = os.path.join(self.directory, 'out.json')
+        apply_units(units, {'ciao': ('hello', True), 'addio "amico"': ('x', False)}, TranslationLog(), data=patches)
+        save_json_patches(patches, self.source, output)
+        start, end = patches.spans[('events', 1)]
+        written = self.read(output).decode('utf-8')
+        self.assertEqual(written[:start], self.text[:start])
+        self.assertTrue(written.endswith(self.text[end:]))
+        self.assertEqual(json.loads(written)['events'][1]['pages'][0]['list'][0]['parameters'], ['hello'])
+        expected = json.loads(self.text)
+        expected['events'][1]['pages'][0]['list'][0]['parameters'] = ['hello']
+        self.assertEqual(json.loads(written), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Checks that mask_codes / unmask_codes give back the original text and reject translations that
+lost, duplicated or invented a placeholder.
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from text_masking import mask_codes, unmask_codes, has_words
+
+TEXTS = [
+    'Ciao \\N[1]!',
+    '\\C[2]Spada\\C[0] ottenuta: %1 pezzi.',
+    'Hai \\V[3]\\G e \\\\ una barra.',
+    '\\{Attenzione!\\} \\. \\| \\! \\> \\< \\^',
+    '%1 ha inflitto %2 danni a %3.',
+    'Città \\I[64] caffè',
+    'Nessun codice qui.',
+    '',
+]
+
+class TextMaskingTest(unittest.TestCase):
+    def test_round_trip(self):
+        for text in TEXTS:
+            masked, codes = mask_codes(text)
+            self.assertEqual(unmask_codes(masked, codes), text, text)
+            self.assertNotIn('\\', masked)
+
+    def test_codes_become_numbered_placeholders(self):
+        masked, codes = mask_codes('\\C[2]Spada\\C[0] ottenuta: %1 pezzi.')
+        self.assertEqual(masked, '{0}Spada{1} ottenuta: {2} pezzi.')
+        self.assertEqual(codes, ('\\C[2]', '\\C[0]', '%1'))
+
+    def test_lines_differing_only_in_codes_share_a_mask(self):
+        self.assertEqual(mask_codes('Ciao \\N[1]!')[0], mask_codes('Ciao \\N[2]!')[0])
+
+    def test_reordered_placeholders_come_back_in_place(self):
+        masked, codes = mask_codes('%1 ha inflitto %2 danni a %3.')
+        self.assertEqual(unmask_codes('{2} took {1} damage from {0}.', codes), '%3 took %2 damage from %1.')
+        # Engines sometimes add spaces inside the braces.
+        self.assertEqual(unmask_codes('{ 0 } dealt { 1 } damage to { 2 }.', codes), '%1 dealt %2 damage to %3.')
+
+    def test_lost_or_duplicated_placeholders_are_rejected(self):
+        masked, codes = mask_codes('\\C[2]Spada\\C[0] ottenuta: %1 pezzi.')
+        self.assertIsNone(unmask_codes('{0}Sword obtained: {2} pieces.', codes))
+        self.assertIsNone(unmask_codes('{0}Sword{1} obtained: {2} {2} pieces.', codes))
+        self.assertIsNone(unmask_codes('{0}Sword{1} obtained: {3} pieces.', codes))
+
+    def test_text_with_placeholder_shapes_is_not_masked(self):
+        self.assertEqual(mask_codes('Premi {0} per \\C[1]continuare'), ('Premi {0} per \\C[1]continuare', ()))
+        self.assertEqual(unmask_codes('Press {0}', ()), 'Press {0}')
+
+    def test_has_words(self):
+        self.assertFalse(has_words(mask_codes('\\C[2]\\I[64] ... \\C[0]')[0]))
+        self.assertTrue(has_words(mask_codes('\\C[2]Spada\\C[0]')[0]))
+
+if __name__ == '__main__':
+    unittest.main()
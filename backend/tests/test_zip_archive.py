@@ -0,0 +1,109 @@
+"""
+Checks the archives written by zip_archive against the standard zipfile reader.
+
+    python -m unittest discover -s tests
+"""
+import io
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+import unittest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from zip_archive import RawZipWriter, iter_raw_member, update_zip_members, write_directory_zip, iter_directory_zip
+
+FILES = {
+    'data/Map001.json': b'{"events": [null, {"name": "EV001"}]}' * 50,
+    'data/System.json': b'{"gameTitle": "Prova"}',
+    'data/Città.json': 'La città è tranquilla.'.encode('utf-8'),
+    'img/キャラ.png': bytes(range(256)) * 8,
+    'empty.txt': b'',
+}
+
+class ZipArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, 'source')
+        for name, data in FILES.items():
+            file_path = os.path.join(self.source, name)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'wb') as f: f.write(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertArchive(self, archive, expected):
+        with zipfile.ZipFile(archive) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(sorted(zf.namelist()), sorted(expected))
+            for name, data in expected.items(): self.assertEqual(zf.read(name), data)
+
+    def test_raw_writer_round_trip(self):
+        buffer = io.BytesIO()
+        writer = RawZipWriter(buffer)
+        writer.add_bytes('deflated.txt', b'abc' * 1000)
+        writer.add_bytes('stored.txt', b'xyz', method=zipfile.ZIP_STORED)
+        writer.add_bytes('dati/città.json', 'è'.encode('utf-8'), date_time=(2020, 5, 17, 12, 30, 44))
+        writer.close()
+        buffer.seek(0)
+        self.assertArchive(buffer, {'deflated.txt': b'abc' * 1000, 'stored.txt': b'xyz', 'dati/città.json': 'è'.encode('utf-8')})
+        with zipfile.ZipFile(buffer) as zf:
+            info = zf.getinfo('dati/città.json')
+            self.assertTrue(info.flag_bits & 0x800)
+            self.assertEqual(info.date_time, (2020, 5, 17, 12, 30, 44))
+            self.assertEqual(zf.getinfo('stored.txt').compress_type, zipfile.ZIP_STORED)
+
+    def test_directory_zip_round_trip(self):
+        for compression in ('stored', 'fast', 'max'):
+            for workers in (1, 3):
+                zip_path = os.path.join(self.directory, f'{compression}-{workers}.zip')
+                write_directory_zip(self.source, zip_path, compression, workers)
+                self.assertArchive(zip_path, FILES)
+
+    def test_streamed_zip_matches_written_zip(self):
+        zip_path = write_directory_zip(self.source, os.path.join(self.directory, 'written.zip'), 'default', 1)
+        streamed = b''.join(iter_directory_zip(self.source, 'default', 1))
+        self.assertArchive(io.BytesIO(streamed), FILES)
+        with open(zip_path, 'rb') as f:
+            self.assertEqual(len(f.read()), len(streamed))
+
+    def test_update_replaces_and_adds_members(self):
+        zip_path = write_directory_zip(self.source, os.path.join(self.directory, 'project.zip'), 'default', 1)
+        replacement = os.path.join(self.directory, 'Città.json')
+        added = os.path.join(self.directory, 'Map002.json')
+        with open(replacement, 'wb') as f: f.write('The city is quiet.'.encode('utf-8'))
+        with open(added, 'wb') as f: f.write(b'{}')
+        update_zip_members(zip_path, {'data/Città.json': replacement, 'data/Map002.json': added})
+        self.assertArchive(zip_path, {**FILES, 'data/Città.json': b'The city is quiet.', 'data/Map002.json': b'{}'})
+        self.assertFalse(os.path.exists(zip_path + '.tmp'))
+
+    def test_update_copies_other_members_raw(self):
+        # Members written by zipfile with another method and level must come back byte for byte.
+        zip_path = os.path.join(self.directory, 'mixed.zip')
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            zf.writestr(zipfile.ZipInfo('stored.bin', (2001, 2, 3, 4, 5, 6)), FILES['img/キャラ.png'])
+            zf.writestr('deflated.json', FILES['data/Map001.json'], zipfile.ZIP_DEFLATED, 1)
+            zf.writestr('System.json', FILES['data/System.json'], zipfile.ZIP_DEFLATED)
+        with zipfile.ZipFile(zip_path) as zf, open(zip_path, 'rb') as fp:
+            before = {info.filename: (info, b''.join(iter_raw_member(fp, info))) for info in zf.infolist()}
+
+        replacement = os.path.join(self.directory, 'System.json')
+        with open(replacement, 'wb') as f: f.write(b'{"gameTitle": "Test"}')
+        update_zip_members(zip_path, {'System.json': replacement})
+
+        self.assertArchive(zip_path, {'stored.bin': FILES['img/キャラ.png'], 'deflated.json': FILES['data/Map001.json'],
+                                      'System.json': b'{"gameTitle": "Test"}'})
+        with zipfile.ZipFile(zip_path) as zf, open(zip_path, 'rb') as fp:
+            for name in ('stored.bin', 'deflated.json'):
+                info = zf.getinfo(name)
+                old_info, old_raw = before[name]
+                self.assertEqual(b''.join(iter_raw_member(fp, info)), old_raw)
+                self.assertEqual((info.compress_type, info.CRC, info.date_time),
+                                 (old_info.compress_type, old_info.CRC, old_info.date_time))
+
+if __name__ == '__main__':
+    unittest.main()
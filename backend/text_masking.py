@@ -0,0 +1,36 @@
+import re
+from print_neatly import ESCAPE_CODE
+
+# Control codes, escaped backslashes and %1-style message arguments are swapped for numbered
+# placeholders before translation, so the engine cannot mangle them and lines that differ only
+# in their codes ("Hello \N[1]!" / "Hello \N[2]!") share one request and one cache entry.
+MASKED = re.compile(ESCAPE_CODE.pattern + r'|\\\\|%\d+')
+PLACEHOLDER = re.compile(r'\{\s*(\d+)\s*\}')
+WORD = re.compile(r'\w')
+
+def mask_codes(text):
+    """
+    Returns (masked_text, codes): the i-th code of text is replaced by {i}. Text that already
+    contains something shaped like a placeholder is returned unmasked with no codes.
+    """
+    if '\\' not in text and '%' not in text: return text, ()
+    if PLACEHOLDER.search(text): return text, ()
+    codes = []
+
+    def placeholder(match):
+        codes.append(match.group(0))
+        return f'{{{len(codes) - 1}}}'
+
+    masked = MASKED.sub(placeholder, text)
+    return masked, tuple(codes)
+
+def has_words(masked):
+    """False if nothing but placeholders, spaces and punctuation is left to translate."""
+    return bool(WORD.search(PLACEHOLDER.sub('', masked)))
+
+def unmask_codes(translation, codes):
+    """Puts the codes back. Returns None unless every placeholder came back exactly once."""
+    if not codes: return translation
+    found = [int(index) for index in PLACEHOLDER.findall(translation)]
+    if sorted(found) != list(range(len(codes))): return None
+    return PLACEHOLDER.sub(lambda match: codes[int(match.group(1))], translation)
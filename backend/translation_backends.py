@@ -0,0 +1,122 @@
+import os
+import re
+import time
+import random
+import threading
+from translation_engine import CONCURRENCY, RATE_LIMIT, RATE_BURST
+
+TRANSLATION_BACKEND = os.environ.get('TRANSLATION_BACKEND', 'googletrans')
+BATCH_SIZE = int(os.environ.get('TRANSLATION_BATCH_SIZE', 50))
+BATCH_MAX_CHARS = int(os.environ.get('TRANSLATION_BATCH_MAX_CHARS', 4500))
+
+MOCK_LATENCY = float(os.environ.get('MOCK_BACKEND_LATENCY', 0.05))
+MOCK_ERROR_RATE = float(os.environ.get('MOCK_BACKEND_ERROR_RATE', 0))
+MOCK_SEED = int(os.environ.get('MOCK_BACKEND_SEED', 0))
+MOCK_BATCH_SIZE = int(os.environ.get('MOCK_BACKEND_BATCH_SIZE', 100))
+MOCK_CONCURRENCY = int(os.environ.get('MOCK_BACKEND_CONCURRENCY', 16))
+MOCK_PREFIX = os.environ.get('MOCK_BACKEND_PREFIX', '')
+
+SEGMENT_MARKER = '[#]'
+SEGMENT_DELIMITER = f'\n{SEGMENT_MARKER}\n'
+SEGMENT_SPLIT = re.compile(r'\s*' + re.escape(SEGMENT_MARKER) + r'\s*')
+
+class TranslationBackend:
+    """
+    A translation engine plus the request shape it works best with. The capability flags are
+    read by the translator: batches are packed up to max_batch_size segments / max_chars
+    characters, at most `concurrency` requests run at once and requests are rate limited to
+    rate_limit per second (0 = unlimited). `latency` is the typical seconds per request.
+    """
+    name = 'base'
+    max_batch_size = 1
+    max_chars = 4500
+    concurrency = CONCURRENCY
+    rate_limit = RATE_LIMIT
+    rate_burst = RATE_BURST
+    latency = 1.0
+
+    def translate(self, text, src, dst):
+        raise NotImplementedError
+
+    def translate_batch(self, texts, src, dst):
+        """
+        Translates several segments in one request. Returns a list aligned with texts, or None if
+        the response could not be split back into segments. By default the segments are joined
+        with a delimiter the engine is expected to leave alone.
+        """
+        translated = self.translate(SEGMENT_DELIMITER.join(texts), src, dst)
+        parts = SEGMENT_SPLIT.split(translated.strip())
+        if len(parts) != len(texts): return None
+        return [part.strip() for part in parts]
+
+    def capabilities(self):
+        return {'name': self.name, 'max_batch_size': self.max_batch_size, 'max_chars': self.max_chars,
+                'concurrency': self.concurrency, 'rate_limit': self.rate_limit, 'latency': self.latency}
+
+class GoogletransBackend(TranslationBackend):
+    name = 'googletrans'
+    max_batch_size = BATCH_SIZE
+    max_chars = BATCH_MAX_CHARS
+    latency = 0.5
+
+    def __init__(self):
+        from googletrans import Translator # type: ignore
+        self.translator = Translator()
+
+    def translate(self, text, src, dst):
+        return self.translator.translate(text, src=src, dest=dst).text
+
+class MockBackendError(Exception):
+    pass
+
+class MockBackend(TranslationBackend):
+    """
+    Offline stand-in for load tests and CI. Returns every segment unchanged (after MOCK_BACKEND_PREFIX),
+    sleeps `latency` seconds per request and fails a seeded-random share of requests, so a run
+    with the same settings makes the same sequence of failures.
+    """
+    name = 'mock'
+    max_batch_size = MOCK_BATCH_SIZE
+    max_chars = 100000
+    concurrency = MOCK_CONCURRENCY
+    rate_limit = 0
+
+    def __init__(self, latency=MOCK_LATENCY, error_rate=MOCK_ERROR_RATE, seed=MOCK_SEED, prefix=MOCK_PREFIX):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.prefix = prefix
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def _request(self):
+        with self.lock:
+            self.requests += 1
+            failed = self.error_rate > 0 and self.random.random() < self.error_rate
+        if self.latency > 0: time.sleep(self.latency)
+        if failed: raise MockBackendError("Simulated backend error")
+
+    def translate(self, text, src, dst):
+        self._request()
+        return self.prefix + text
+
+    def translate_batch(self, texts, src, dst):
+        self._request()
+        return [self.prefix + text for text in texts]
+
+BACKENDS = {
+    'googletrans': GoogletransBackend,
+    'mock': MockBackend,
+}
+
+backends = {}
+backends_lock = threading.Lock()
+
+def get_backend(name=None):
+    """Returns the shared instance of a registered backend (TRANSLATION_BACKEND by default)."""
+    name = name or TRANSLATION_BACKEND
+    with backends_lock:
+        if name not in backends:
+            if name not in BACKENDS: raise ValueError(f"Unknown translation backend '{name}'. Available: {', '.join(BACKENDS)}")
+            backends[name] = BACKENDS[name]()
+        return backends[name]
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+CACHE_PATH = os.environ.get('TRANSLATION_CACHE_PATH', 'translation_memory.sqlite3')
+CACHE_MAX_ENTRIES = int(os.environ.get('TRANSLATION_CACHE_MAX_ENTRIES', 500000))
+CACHE_LRU_SIZE = int(os.environ.get('TRANSLATION_CACHE_LRU_SIZE', 20000))
+EVICTION_CHECK_INTERVAL = 1000
+
+def normalize_text(text):
+    """Canonical form used as the cache key: NFC-normalized, surrounding whitespace stripped."""
+    return unicodedata.normalize('NFC', text).strip()
+
+class TranslationMemory:
+    """
+    Persistent (backend, src, dst, text) -> translation store, so translations of one backend
+    (such as the mock one) are never served for another.
+    A small in-process LRU sits in front of an SQLite table; the table is trimmed
+    back to max_entries by dropping the least recently used rows.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, lru_size=CACHE_LRU_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self.lru = OrderedDict()
+        self.lock = threading.Lock()
+        self.puts_since_eviction = 0
+
+        directory = os.path.dirname(path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(memory)')]
+        if columns and 'backend' not in columns:
+            # Memories written before the backend was part of the key only ever held googletrans results
+            self.conn.execute('ALTER TABLE memory RENAME TO memory_unkeyed')
+            self.conn.execute('DROP INDEX IF EXISTS memory_last_used')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS memory ('
+            'backend TEXT NOT NULL, src TEXT NOT NULL, dst TEXT NOT NULL, text TEXT NOT NULL, '
+            'translation TEXT NOT NULL, last_used REAL NOT NULL, '
+            'PRIMARY KEY (backend, src, dst, text))'
+        )
+        if columns and 'backend' not in columns:
+            self.conn.execute("INSERT INTO memory SELECT 'googletrans', src, dst, text, translation, last_used FROM memory_unkeyed")
+            self.conn.execute('DROP TABLE memory_unkeyed')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)')
+        self.conn.commit()
+
+    def _remember(self, key, translation):
+        self.lru[key] = translation
+        self.lru.move_to_end(key)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def get(self, backend, src, dst, text):
+        key = (backend, src, dst, normalize_text(text))
+        with self.lock:
+            if key in self.lru:
+                self.lru.move_to_end(key)
+                return self.lru[key]
+            row = self.conn.execute(
+                'SELECT translation FROM memory WHERE backend = ? AND src = ? AND dst = ? AND text = ?', key
+            ).fetchone()
+            if row is None: return None
+            self.conn.execute(
+                'UPDATE memory SET last_used = ? WHERE backend = ? AND src = ? AND dst = ? AND text = ?', (time.time(),) + key
+            )
+            self.conn.commit()
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, backend, src, dst, text, translation):
+        key = (backend, src, dst, normalize_text(text))
+        with self.lock:
+            self._remember(key, translation)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO memory (backend, src, dst, text, translation, last_used) VALUES (?, ?, ?, ?, ?, ?)',
+                key + (translation, time.time())
+            )
+            self.conn.commit()
+            self.puts_since_eviction += 1
+            if self.puts_since_eviction >= EVICTION_CHECK_INTERVAL:
+                self.puts_since_eviction = 0
+                self._evict()
+
+    def _evict(self):
+        count = self.conn.execute('SELECT COUNT(*) FROM memory').fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0: return
+        self.conn.execute(
+            'DELETE FROM memory WHERE rowid IN (SELECT rowid FROM memory ORDER BY last_used LIMIT ?)', (excess,)
+        )
+        self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.lru.clear()
+            self.conn.execute('DELETE FROM memory')
+            self.conn.commit()
+
+translation_memory = TranslationMemory()
@@ -0,0 +1,115 @@
+import os
+import time
+import random
+import queue
+import threading
+from collections import OrderedDict, deque
+
+CONCURRENCY = int(os.environ.get('TRANSLATION_CONCURRENCY', 4))
+RATE_LIMIT = float(os.environ.get('TRANSLATION_RATE_LIMIT', 5))
+RATE_BURST = int(os.environ.get('TRANSLATION_RATE_BURST', 10))
+MAX_RETRIES = int(os.environ.get('TRANSLATION_MAX_RETRIES', 5))
+BACKOFF_BASE = float(os.environ.get('TRANSLATION_BACKOFF_BASE', 1.0))
+BACKOFF_MAX = float(os.environ.get('TRANSLATION_BACKOFF_MAX', 30.0))
+
+class TokenBucket:
+    """Blocking token bucket: `rate` requests per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0: return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(backend_name, rate=RATE_LIMIT, burst=RATE_BURST):
+    with rate_limiters_lock:
+        if backend_name not in rate_limiters:
+            rate_limiters[backend_name] = TokenBucket(rate, burst)
+        return rate_limiters[backend_name]
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def call_with_backoff(fn, limiter=None, max_retries=MAX_RETRIES, on_retry=None):
+    """
+    Calls fn() until it succeeds, waiting on the rate limiter before every attempt and
+    backing off exponentially between failures. The last exception is re-raised.
+    """
+    for attempt in range(max_retries):
+        if limiter is not None: limiter.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries - 1: raise
+            if on_retry: on_retry(attempt, e)
+            time.sleep(backoff_delay(attempt))
+
+class FairBatchPool:
+    """
+    Fixed set of worker threads shared by every job. Each job gets its own task queue and workers
+    take one task per job in round-robin order, so a huge project cannot starve a small one.
+    """
+
+    def __init__(self, workers=CONCURRENCY):
+        self.workers = max(1, workers)
+        self.queues = OrderedDict()
+        self.cond = threading.Condition()
+        self.threads = []
+
+    def _ensure_started(self):
+        if self.threads: return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'translate-worker-{i}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _next_task(self):
+        with self.cond:
+            while not self.queues: self.cond.wait()
+            key, tasks = next(iter(self.queues.items()))
+            task = tasks.popleft()
+            del self.queues[key]
+            if tasks: self.queues[key] = tasks
+            return task
+
+    def _worker(self):
+        while True:
+            fn, item, results = self._next_task()
+            try: results.put((item, fn(item), None))
+            except Exception as e: results.put((item, None, e))
+
+    def pending(self):
+        with self.cond:
+            return sum(len(tasks) for tasks in self.queues.values())
+
+    def map_unordered(self, key, fn, items):
+        """Runs fn(item) for every item on the shared workers, yielding (item, result) as they finish."""
+        items = list(items)
+        if not items: return
+        results = queue.Queue()
+        with self.cond:
+            self._ensure_started()
+            self.queues.setdefault(key, deque()).extend((fn, item, results) for item in items)
+            self.cond.notify_all()
+        for _ in items:
+            item, result, error = results.get()
+            if error is not None: raise error
+            yield item, result
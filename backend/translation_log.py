@@ -0,0 +1,136 @@
+import sys
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple, Optional, Tuple
+
+TYPE_ERROR = sys.intern('error')
+TYPE_ANOMALY = sys.intern('anomaly')
+
+class LogRecord(NamedTuple):
+    type: str
+    path: Optional[str]
+    index: Optional[int]
+    total: Optional[int]
+    raw: str
+    translated: Optional[str]
+    location: Optional[Tuple] = None
+    width: Optional[int] = None  # display width a message block was wrapped to
+
+def _as_tuple(value):
+    return tuple(_as_tuple(part) for part in value) if isinstance(value, list) else value
+
+def load_record(fields):
+    """
+    A LogRecord from its JSON form (a list of its fields). JSON turns locations into lists; they are
+    tuples again, nested for message blocks.
+    """
+    type, path, index, total, raw, translated, location, width = fields
+    return LogRecord(sys.intern(type), path, index, total, raw, translated, _as_tuple(location), width)
+
+class TranslationLog:
+    """
+    Append-only job log. Records are plain tuples in one flat list; the file they belong to is
+    stored once per segment (a run of consecutive records from the same file) instead of on
+    every record. Reads return the same dicts the API has always exposed, plus the entry's `id`
+    (its position), which the edit endpoint resolves back to the file and JSON location.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.segment_starts = []
+        self.segment_files = []
+        self.segment_paths = []
+
+    def begin_file(self, file_name, relative_path=None):
+        """
+        Starts a new segment; every record appended until the next call belongs to file_name.
+        relative_path is where the file sits inside the translated output.
+        """
+        if file_name is not None: file_name = sys.intern(file_name)
+        if relative_path is None: relative_path = file_name
+        if self.segment_starts and self.segment_starts[-1] == len(self.records):
+            self.segment_files[-1] = file_name
+            self.segment_paths[-1] = relative_path
+            return
+        self.segment_starts.append(len(self.records))
+        self.segment_files.append(file_name)
+        self.segment_paths.append(relative_path)
+
+    def extend(self, other):
+        """Appends every record of another TranslationLog (e.g. one built in a worker process)."""
+        offset = len(self.records)
+        for start, file_name, relative_path in zip(other.segment_starts, other.segment_files, other.segment_paths):
+            self.segment_starts.append(offset + start)
+            self.segment_files.append(sys.intern(file_name) if file_name is not None else None)
+            self.segment_paths.append(relative_path)
+        self.records.extend(other.records)
+
+    def tail(self, start):
+        """The records from position start on and the segments that begin among them, for append_tail()."""
+        first = bisect_left(self.segment_starts, start)
+        end = len(self.records)
+        segments = [(segment_start, file_name, relative_path) for segment_start, file_name, relative_path
+                    in zip(self.segment_starts[first:], self.segment_files[first:], self.segment_paths[first:]) if segment_start < end]
+        return start, self.records[start:], segments
+
+    def append_tail(self, tail):
+        """Appends a tail() of another copy of this log, taken where this copy ends."""
+        start, records, segments = tail
+        if start != len(self.records): raise ValueError(f"Log tail starts at {start}, log has {len(self.records)} records")
+        for segment_start, file_name, relative_path in segments:
+            self.segment_starts.append(segment_start)
+            self.segment_files.append(sys.intern(file_name) if file_name is not None else None)
+            self.segment_paths.append(relative_path)
+        self.records.extend(records)
+
+    def add(self, type, path, index, total, raw, translated, location=None, width=None):
+        self.records.append(LogRecord(sys.intern(type), path, index, total, raw, translated, location, width))
+
+    def anomaly(self, path, raw):
+        self.records.append(LogRecord(TYPE_ANOMALY, path, None, None, raw, None))
+
+    def error(self, message):
+        self.begin_file(None)
+        self.records.append(LogRecord(TYPE_ERROR, None, None, None, message, None))
+
+    def _segment(self, position):
+        return bisect_right(self.segment_starts, position) - 1
+
+    def segment_bounds(self, position):
+        """(start, end) positions of the segment (the file's run of records) that holds position."""
+        segment = self._segment(position)
+        end = self.segment_starts[segment + 1] if segment + 1 < len(self.segment_starts) else len(self.records)
+        return self.segment_starts[segment], end
+
+    def file_of(self, position):
+        segment = self._segment(position)
+        return self.segment_files[segment] if segment >= 0 else None
+
+    def locate(self, position):
+        """Returns (relative_path, location) of a translated entry, or None if it cannot be edited."""
+        if not 0 <= position < len(self.records): return None
+        record = self.records[position]
+        segment = self._segment(position)
+        if record.location is None or segment < 0 or self.segment_paths[segment] is None: return None
+        return self.segment_paths[segment], record.location
+
+    def set_translation(self, position, translated):
+        self.records[position] = self.records[position]._replace(translated=translated)
+
+    def entry(self, position):
+        record = self.records[position]
+        if record.type == TYPE_ERROR: return {'type': TYPE_ERROR, 'message': record.raw}
+        file_name = self.file_of(position) or ''
+        if record.type == TYPE_ANOMALY: return {'type': TYPE_ANOMALY, 'file': file_name, 'path': record.path, 'raw': record.raw}
+        return {'id': position, 'type': record.type, 'file': file_name, 'path': record.path, 'index': record.index,
+                'total': record.total, 'raw': record.raw, 'translated': record.translated}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice): return [self.entry(i) for i in range(*key.indices(len(self.records)))]
+        if key < 0: key += len(self.records)
+        return self.entry(key)
+
+    def __iter__(self):
+        for i in range(len(self.records)): yield self.entry(i)
@@ -2,215 +2,842 @@ import os
 import json
 import time
 import copy
-from googletrans import Translator # type: ignore
-from print_neatly import print_neatly
+import threading
+import multiprocessing
+from bisect import bisect_left
+from typing import NamedTuple, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from print_neatly import print_neatly, print_neatly_batch, reflow_lines
+from translation_cache import translation_memory, normalize_text
+from text_masking import mask_codes, unmask_codes, has_words
+from translation_log import TranslationLog
+from project_manifest import ProjectManifest, file_digest
+from translation_engine import get_rate_limiter, call_with_backoff, FairBatchPool, MAX_RETRIES
+from translation_backends import get_backend, SEGMENT_MARKER, SEGMENT_DELIMITER
+from job_store import create_job_store
+import metrics
+from metrics import StageTimer, FILE_SECONDS, BACKEND_REQUEST_SECONDS, JOBS
 from file_handler import (
-    get_rpgm_files, parse_json_file, save_json_file, 
-    create_translated_directory, create_zip, get_file_path
+    get_rpgm_files, parse_json_file, save_json_file,
+    create_translated_directory, get_file_path,
+    read_json_text, iter_json_array_items, JsonItemPatches, save_json_patches
 )
 
-translator = Translator()
-translation_status = {}
+backend = get_backend()
+# Batches run on as many shared threads as the backend accepts concurrent requests.
+batch_pool = FairBatchPool(backend.concurrency)
+job_store = create_job_store()
+stats_lock = threading.Lock()
+metrics.registry.register(metrics.Gauge('rpgm_batch_pool_pending', 'Translation batches waiting for a worker.', batch_pool.pending))
+# Job counters that are also exported process-wide
+METRIC_COUNTERS = {
+    'cache_hits': (metrics.CACHE_LOOKUPS, ('hit',)),
+    'cache_misses': (metrics.CACHE_LOOKUPS, ('miss',)),
+    'retries': (metrics.RETRIES, (backend.name,)),
+    'failed_strings': (metrics.FAILED_STRINGS, ()),
+}
+SLOWEST_FILES = 5
+
+STREAMING_THRESHOLD_BYTES = int(os.environ.get('STREAMING_THRESHOLD_BYTES', 8 * 1024 * 1024))
+PROCESS_WORKERS = int(os.environ.get('PROCESS_WORKERS', 0))
+# Requests of one job that may fail through all their retries before the rest of the job is no
+# longer sent to the backend (its strings are kept untranslated and counted as failed).
+FAILED_REQUEST_BUDGET = int(os.environ.get('FAILED_REQUEST_BUDGET', 10))
+# Consecutive 401 (Show Text) / 405 (Show Scrolling Text) lines are translated as one unit and
+# rewrapped over the same lines; a message with a face image has a narrower window.
+MESSAGE_BLOCKS = os.environ.get('MESSAGE_BLOCKS', '1') == '1'
+MESSAGE_LINE_WIDTH = int(os.environ.get('MESSAGE_LINE_WIDTH', 55))
+MESSAGE_FACE_LINE_WIDTH = int(os.environ.get('MESSAGE_FACE_LINE_WIDTH', 40))
+OBJECT_FILES = ['Actors.json', 'Classes.json', 'Skills.json', 'Items.json', 'Weapons.json', 'Armors.json', 'Enemies.json', 'States.json', 'System.json']
 
 def update_translation_status(job_id, status):
     status['timestamp'] = time.time()
-    translation_status[job_id] = status
+    job_store.set(job_id, status)
 
-def get_translation_status(job_id):
-    return translation_status.get(job_id, {'status': 'not_found'})
+def patch_translation_status(job_id, fields):
+    """Merges fields into the job's current status in one atomic store update."""
+    job_store.update(job_id, {**fields, 'timestamp': time.time()})
 
-def translate_sentence(text, src='it', dst='en'):
-    if not text or not text.strip(): return text
-    try:
-        translation = translator.translate(text, src=src, dest=dst).text
-        if text[0].isalpha() and translation[0].isalpha() and not text[0].isupper():
-            translation = translation[0].lower() + translation[1:]
-        return translation
-    except Exception as e:
-        print(f"Direct translation failed for '{text}': {e}")
-        return text
+def get_translation_status(job_id, logs=False):
+    """The job's status; its TranslationLog is only loaded with logs=True (otherwise there is just 'log_count')."""
+    return job_store.get(job_id, logs) or {'status': 'not_found'}
+
+def save_log_edits(job_id, log, positions):
+    """Stores log records changed in place by an edit, without rewriting the rest of the log."""
+    job_store.save_log_edits(job_id, log, positions)
+
+def _count(stats, key, amount=1):
+    counter = METRIC_COUNTERS.get(key)
+    if counter: counter[0].inc(*counter[1], amount=amount)
+    if stats is None: return
+    with stats_lock: stats[key] = stats.get(key, 0) + amount
+
+def _call_backend(fn, stats=None, max_retries=MAX_RETRIES):
+    def attempt():
+        _count(stats, 'backend_calls')
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except Exception:
+            BACKEND_REQUEST_SECONDS.observe(time.perf_counter() - started, backend.name, 'error')
+            raise
+        BACKEND_REQUEST_SECONDS.observe(time.perf_counter() - started, backend.name, 'ok')
+        return result
+    return call_with_backoff(attempt, get_rate_limiter(backend.name, backend.rate_limit, backend.rate_burst), max_retries,
+                             on_retry=lambda attempt_index, e: _count(stats, 'retries'))
+
+def _match_case(text, translation):
+    if text[0].isalpha() and translation and translation[0].isalpha() and not text[0].isupper():
+        translation = translation[0].lower() + translation[1:]
+    return translation
+
+def _translate_text(text, src, dst):
+    return _match_case(text, backend.translate(text, src, dst))
+
+def _translate_packed(texts, src, dst):
+    """Translates several segments in one request. Returns None if the delimiters did not survive."""
+    translated = backend.translate_batch(texts, src, dst)
+    if translated is None or len(translated) != len(texts): return None
+    return [_match_case(text, part) for text, part in zip(texts, translated)]
+
+def _restore_whitespace(original, translation):
+    stripped = original.strip()
+    leading = original[:len(original) - len(original.lstrip())]
+    trailing = original[len(stripped) + len(leading):]
+    return leading + translation + trailing
 
-def try_translate_sentence(text, src='it', dst='en', max_retries=3):
-    if not text or not text.strip(): return text, True
-    for attempt in range(max_retries):
+def _pack_batches(texts, batch_size, max_chars):
+    batch, batch_chars = [], 0
+    for text in texts:
+        if SEGMENT_MARKER in text:
+            yield [text]
+            continue
+        cost = len(text) + len(SEGMENT_DELIMITER)
+        if batch and (len(batch) >= batch_size or batch_chars + cost > max_chars):
+            yield batch
+            batch, batch_chars = [], 0
+        batch.append(text); batch_chars += cost
+    if batch: yield batch
+
+def _budget_spent(stats):
+    return stats is not None and stats.get('failed_requests', 0) >= FAILED_REQUEST_BUDGET
+
+def _failed(texts, stats):
+    _count(stats, 'failed_strings', len(texts))
+    return [(text, False) for text in texts]
+
+def _translate_batch(texts, src, dst, max_retries=MAX_RETRIES, stats=None):
+    """
+    Returns a list of (translation, success) aligned with texts. A packed request whose delimiters
+    were lost is sent again one text per request; one that kept failing fails the whole batch.
+    """
+    if _budget_spent(stats): return _failed(texts, stats)
+    if len(texts) > 1:
         try:
-            result = translate_sentence(text, src, dst)
-            return result, True
+            translated = _call_backend(lambda: _translate_packed(texts, src, dst), stats, max_retries)
         except Exception as e:
-            if attempt == max_retries - 1:
-                print(f"Translation failed after {max_retries} retries for '{text}': {e}")
-                return text, False
-            time.sleep(1)
-    return text, False
+            print(f"Batch translation of {len(texts)} segments failed after {max_retries} retries: {e}")
+            _count(stats, 'failed_requests')
+            return _failed(texts, stats)
+        if translated is not None: return [(tr, True) for tr in translated]
 
-def translate_objects_file(data, src, dst, logs, max_len=55):
-    translations = 0
+    results = []
+    for text in texts:
+        if _budget_spent(stats):
+            results.extend(_failed(texts[len(results):], stats))
+            break
+        try:
+            results.append((_call_backend(lambda: _translate_text(text, src, dst), stats, max_retries), True))
+        except Exception as e:
+            print(f"Translation failed after {max_retries} retries for '{text}': {e}")
+            _count(stats, 'failed_requests')
+            results.extend(_failed([text], stats))
+    return results
+
+def translate_texts(texts, src, dst, stats=None, batch_size=None, max_chars=None, progress=None, job_key=None):
+    """
+    Translates a collection of strings with as few backend round trips as possible.
+    Control codes are masked first (see text_masking), so lines that differ only in their
+    codes share one cache entry. Duplicates and cache hits are resolved locally; the
+    remaining unique strings are packed into batches shaped by the backend's capabilities
+    (unless batch_size / max_chars are given) that run on the shared batch pool, interleaved
+    fairly with the batches of other jobs (`job_key` identifies this caller's share).
+    Returns {original_text: (translation, success)}.
+    """
+    results = {}
+    pending = {}
+    for text in dict.fromkeys(texts):
+        if not text or not text.strip():
+            results[text] = (text, True)
+            continue
+        masked, codes = mask_codes(text)
+        if codes and not has_words(masked):
+            results[text] = (text, True)
+            continue
+        cached = translation_memory.get(backend.name, src, dst, masked)
+        restored = unmask_codes(cached, codes) if cached is not None else None
+        if restored is not None:
+            _count(stats, 'cache_hits')
+            results[text] = (_restore_whitespace(text, restored), True)
+            continue
+        key_text = normalize_text(masked)
+        if key_text not in pending:
+            _count(stats, 'cache_misses')
+            pending[key_text] = []
+        pending[key_text].append((text, codes))
+
+    done = 0
+    unmasked = []
+    batches = [tuple(batch) for batch in _pack_batches(list(pending), batch_size or backend.max_batch_size, max_chars or backend.max_chars)]
+    translate_batch = lambda batch: _translate_batch(list(batch), src, dst, stats=stats)
+    for batch, translated in batch_pool.map_unordered(job_key or object(), translate_batch, batches):
+        for key_text, (tr, success) in zip(batch, translated):
+            if not success:
+                for original, _ in pending[key_text]: results[original] = (original, False)
+                continue
+            restored = [(original, unmask_codes(tr, codes)) for original, codes in pending[key_text]]
+            if any(translation is None for _, translation in restored):
+                # A placeholder was lost or duplicated: these lines are sent again with their codes in place.
+                unmasked.extend(original for original, _ in pending[key_text])
+                continue
+            translation_memory.put(backend.name, src, dst, key_text, tr)
+            for original, translation in restored: results[original] = (_restore_whitespace(original, translation), True)
+        done += len(batch)
+        if progress: progress(done, len(pending))
+
+    if unmasked:
+        _count(stats, 'unmasked_retries', len(unmasked))
+        for original, (tr, success) in zip(unmasked, _translate_batch([normalize_text(text) for text in unmasked], src, dst, stats=stats)):
+            results[original] = (_restore_whitespace(original, tr), True) if success else (original, False)
+    return results
+
+def translate_sentence(text, src='it', dst='en'):
+    return try_translate_sentence(text, src, dst)[0]
+
+def try_translate_sentence(text, src='it', dst='en', stats=None):
+    """Single-string form of translate_texts: returns (translation, success)."""
+    return translate_texts([text], src, dst, stats)[text]
+
+def extract_objects_units(data, max_len=55):
+    units = []
     for i, d in enumerate(data):
         if d is None: continue
         total_items = sum(1 for key in d if key in ['name', 'description', 'profile'] or key.startswith('message'))
         current_item_index = 0
-
-        if 'name' in d and d['name'] and len(d['name'].strip()) > 0:
-            current_item_index += 1
-            tr, success = try_translate_sentence(d['name'], src, dst)
-            if success:
-                translations += 1
-                logs.append({'type': 'object', 'file': '', 'path': f'object[{i}].name', 'index': current_item_index, 'total': total_items, 'raw': d['name'], 'translated': tr})
-                d['name'] = tr
-            else: logs.append({'type': 'anomaly', 'path': f'object[{i}].name', 'raw': d['name']})
-
-        if 'description' in d and d['description'] and len(d['description'].strip()) > 0:
-            current_item_index += 1
-            tr, success = try_translate_sentence(d['description'], src, dst)
-            if success:
-                translations += 1
-                try: text_neat = print_neatly(tr, max_len); final_translated = '\n'.join(text_neat)
-                except: final_translated = tr
-                logs.append({'type': 'object', 'file': '', 'path': f'object[{i}].description', 'index': current_item_index, 'total': total_items, 'raw': d['description'], 'translated': final_translated})
-                d['description'] = final_translated
-            else: logs.append({'type': 'anomaly', 'path': f'object[{i}].description', 'raw': d['description']})
-
-        if 'profile' in d and d['profile'] and len(d['profile'].strip()) > 0:
-            current_item_index += 1
-            tr, success = try_translate_sentence(d['profile'], src, dst)
-            if success:
-                translations += 1
-                try: text_neat = print_neatly(tr, max_len); final_translated = '\n'.join(text_neat)
-                except: final_translated = tr
-                logs.append({'type': 'object', 'file': '', 'path': f'object[{i}].profile', 'index': current_item_index, 'total': total_items, 'raw': d['profile'], 'translated': final_translated})
-                d['profile'] = final_translated
-            else: logs.append({'type': 'anomaly', 'path': f'object[{i}].profile', 'raw': d['profile']})
-        
-        for m in range(1, 5):
-            message_key = f'message{m}'
-            if message_key in d and d[message_key] and len(d[message_key].strip()) > 0:
+        keys = ['name', 'description', 'profile'] + [f'message{m}' for m in range(1, 5)]
+        for key in keys:
+            if key in d and d[key] and len(d[key].strip()) > 0:
                 current_item_index += 1
-                tr, success = try_translate_sentence(d[message_key], src, dst)
-                if success:
-                    translations += 1
-                    logs.append({'type': 'object', 'file': '', 'path': f'object[{i}].{message_key}', 'index': current_item_index, 'total': total_items, 'raw': d[message_key], 'translated': tr})
-                    d[message_key] = tr
-                else: logs.append({'type': 'anomaly', 'path': f'object[{i}].{message_key}', 'raw': d[message_key]})
-    return data, translations
+                units.append({'type': 'object', 'path': f'object[{i}].{key}', 'index': current_item_index, 'total': total_items,
+                              'raw': d[key], 'container': d, 'key': key, 'location': (i, key),
+                              'max_len': max_len if key in ['description', 'profile'] else None})
+    return units
 
-def translate_dialogs_file(data, src, dst, logs, max_len=40, use_neatly=False):
-    translations = 0
-    all_translatable_items = []
-    for event in data.get("events", []):
+class MessageBlock(NamedTuple):
+    """The lines of one coalesced 401/405 run, the display width they are rewrapped to and the indent of their commands."""
+    lines: Tuple[str, ...]
+    width: int
+    indent: int = 0
+
+    @property
+    def text(self):
+        return ' '.join(line.strip() for line in self.lines if line.strip())
+
+# Commands with a single text parameter: Change Name / Nickname / Profile (actorId, text)
+TEXT_PARAMETERS = {320: 1, 324: 1, 325: 1}
+LINE_CODES = (401, 405)
+
+def iter_command_strings(commands, prefix):
+    """
+    Yields one list of (location, code, text) per text-bearing command of an event command list,
+    `prefix` being the JSON path of the list. With MESSAGE_BLOCKS a run of 401/405 lines (a single
+    line too) is one entry whose location is the tuple of line locations and text a MessageBlock.
+    """
+    c, width = 0, MESSAGE_LINE_WIDTH
+    while c < len(commands):
+        command = commands[c]
+        code = command.get('code')
+        parameters = command.get('parameters', [])
+        location = prefix + (c, 'parameters')
+        if code in LINE_CODES:
+            end = c
+            while end < len(commands) and commands[end].get('code') == code: end += 1
+            lines = [(prefix + (line, 'parameters', 0), commands[line]['parameters'][0]) for line in range(c, end)]
+            if MESSAGE_BLOCKS:
+                yield [(tuple(line_location for line_location, _ in lines), code,
+                        MessageBlock(tuple(text for _, text in lines), width if code == 401 else MESSAGE_LINE_WIDTH,
+                                     commands[end - 1].get('indent', 0)))]
+            else:
+                for line_location, text in lines: yield [(line_location, code, text)]
+            c = end
+            continue
+        if code == 101:
+            width = MESSAGE_FACE_LINE_WIDTH if parameters and parameters[0] else MESSAGE_LINE_WIDTH
+            # MZ stores the speaker name as the fifth parameter.
+            if len(parameters) > 4 and isinstance(parameters[4], str) and parameters[4].strip():
+                yield [(location + (4,), code, parameters[4])]
+        elif code == 102:
+            yield [(location + (0, j), code, choice) for j, choice in enumerate(parameters[0]) if choice]
+        elif code == 402 and len(parameters) == 2:
+            yield [(location + (1,), code, parameters[1])]
+        elif code in TEXT_PARAMETERS and len(parameters) > TEXT_PARAMETERS[code] and isinstance(parameters[TEXT_PARAMETERS[code]], str):
+            yield [(location + (TEXT_PARAMETERS[code],), code, parameters[TEXT_PARAMETERS[code]])]
+        c += 1
+
+def iter_dialog_strings(events):
+    """
+    Yields (command_index, location, code, text) for every translatable string of a Map file.
+    `events` is an iterable of (event_index, event); `location` is the JSON path of the string
+    (a tuple of line paths for a MessageBlock).
+    """
+    i = 0
+    for e, event in events:
         if event is None: continue
-        for page in event.get('pages', []):
-            for command in page.get('list', []):
-                if command.get('code') in [401, 102] or (command.get('code') == 402 and len(command.get('parameters', [])) == 2):
-                    all_translatable_items.append({'event': event, 'page': page, 'command': command})
-    total_items = len(all_translatable_items)
-
-    for i, item in enumerate(all_translatable_items):
-        command = item['command']; current_index = i + 1
-        if command.get('code') == 102:
-            for j, choice in enumerate(command['parameters'][0]):
-                if choice:
-                    tr, success = try_translate_sentence(choice, src, dst)
-                    if success:
-                        translations += 1
-                        logs.append({'type': 'dialog', 'file': '', 'path': f'command[{i}].choice[{j}]', 'index': current_index, 'total': total_items, 'raw': choice, 'translated': tr})
-                        command['parameters'][0][j] = tr
-                    else: logs.append({'type': 'anomaly', 'path': f'command[{i}].choice[{j}]', 'raw': choice})
-        elif command.get('code') == 402:
-            tr, success = try_translate_sentence(command['parameters'][1], src, dst)
-            if success:
-                translations += 1
-                logs.append({'type': 'dialog', 'file': '', 'path': f'command[{i}].answer', 'index': current_index, 'total': total_items, 'raw': command['parameters'][1], 'translated': tr})
-                command['parameters'][1] = tr
-            else: logs.append({'type': 'anomaly', 'path': f'command[{i}].answer', 'raw': command['parameters'][1]})
-        elif command.get('code') == 401:
-            tr, success = try_translate_sentence(command['parameters'][0], src, dst)
-            if success:
-                translations += 1
-                logs.append({'type': 'dialog', 'file': '', 'path': f'command[{i}].text', 'index': current_index, 'total': total_items, 'raw': command['parameters'][0], 'translated': tr})
-                command['parameters'][0] = tr
-            else: logs.append({'type': 'anomaly', 'path': f'command[{i}].text', 'raw': command['parameters'][0]})
-    return data, translations
+        for p, page in enumerate(event.get('pages', [])):
+            for strings in iter_command_strings(page.get('list', []), ('events', e, 'pages', p, 'list')):
+                for location, code, text in strings: yield i, location, code, text
+                i += 1
 
-def translate_common_events_file(data, src, dst, logs, max_len=55):
-    translations = 0
-    all_translatable_items = []
-    for d in data:
+LEGACY_FIELDS = {101: 'speaker', 320: 'name', 324: 'nickname', 325: 'profile'}
+
+def _legacy_dialog_path(i, location, code, kind='command'):
+    if code == 102: return f'{kind}[{i}].choice[{location[-1]}]'
+    if code == 402: return f'{kind}[{i}].answer'
+    return f'{kind}[{i}].{LEGACY_FIELDS.get(code, "text")}'
+
+def _resolve_container(data, location):
+    container = data
+    for part in location[:-1]: container = container[part]
+    return container, location[-1]
+
+def _dialog_units(strings, resolve, type='dialog', kind='command'):
+    units, total_items = [], 0
+    for i, location, code, text in strings:
+        path = _legacy_dialog_path(i, location, code, kind)
+        if isinstance(text, MessageBlock):
+            units.append({'type': type, 'path': path, 'index': i + 1, 'raw': text.text, 'container': None, 'key': None,
+                          'location': location, 'max_len': None, 'lines': [resolve(line) for line in location],
+                          'raw_lines': text.lines, 'width': text.width, 'code': code, 'indent': text.indent})
+        else:
+            container, key = resolve(location)
+            units.append({'type': type, 'path': path, 'index': i + 1, 'raw': text,
+                          'container': container, 'key': key, 'location': location, 'max_len': None})
+        total_items = i + 1
+    for unit in units: unit['total'] = total_items
+    return units
+
+def extract_dialog_units(data):
+    return _dialog_units(iter_dialog_strings(enumerate(data.get("events", []))), lambda location: _resolve_container(data, location))
+
+def extract_dialog_units_streaming(text):
+    """
+    Extracts a Map file from its raw text, decoding one event at a time instead of the whole tree.
+    Translations land in the returned JsonItemPatches, keyed by location, for save_json_patches.
+    """
+    patches = JsonItemPatches()
+
+    def events():
+        for e, event, start, end in iter_json_array_items(text, 'events'):
+            patches.spans[('events', e)] = (start, end)
+            yield e, event
+
+    return _dialog_units(iter_dialog_strings(events()), lambda location: (patches, location)), patches
+
+def iter_common_event_strings(data):
+    """Yields (command_index, location, code, text) for every translatable string of CommonEvents.json."""
+    i = 0
+    for e, d in enumerate(data):
         if d is None: continue
-        for command in d.get('list', []):
-            if command.get('code') == 401:
-                all_translatable_items.append({'event': d, 'command': command})
-    total_items = len(all_translatable_items)
-    for i, item in enumerate(all_translatable_items):
-        command = item['command']; current_index = i + 1
-        tr, success = try_translate_sentence(command['parameters'][0], src, dst)
-        if success:
-            translations += 1
-            logs.append({'type': 'common_event', 'file': '', 'path': f'common_event[{i}].text', 'index': current_index, 'total': total_items, 'raw': command['parameters'][0], 'translated': tr})
-            command['parameters'][0] = tr
-        else: logs.append({'type': 'anomaly', 'path': f'common_event[{i}].text', 'raw': command['parameters'][0]})
+        for strings in iter_command_strings(d.get('list', []), (e, 'list')):
+            for location, code, text in strings: yield i, location, code, text
+            i += 1
+
+def extract_common_event_units(data):
+    return _dialog_units(iter_common_event_strings(data), lambda location: _resolve_container(data, location), 'common_event', 'common_event')
+
+def extract_file_units(file_name, data):
+    """Returns the translatable units of an RPG Maker data file, or None if the file is not translated."""
+    if file_name.startswith('Map'): return extract_dialog_units(data)
+    if file_name == 'CommonEvents.json': return extract_common_event_units(data)
+    if file_name in OBJECT_FILES: return extract_objects_units(data)
+    return None
+
+def file_kind(file_name):
+    """Metric label for a data file: map, common_events, database or other."""
+    if file_name == 'CommonEvents.json': return 'common_events'
+    if file_name.startswith('Map') and file_name != 'MapInfos.json': return 'map'
+    if file_name in OBJECT_FILES: return 'database'
+    return 'other'
+
+def _command_position(location):
+    """Splits the location of a command's parameter into (location of the command list, command index)."""
+    command = location.index('parameters') - 1
+    return location[:command], location[command]
+
+def _shifted_location(location, shifts):
+    """
+    The location of a string after message blocks gained or lost commands. shifts maps a command
+    list's location to (sorted indexes of the last line of each resized block, running totals of
+    the commands added, negative for removed ones); see _block_shifts.
+    """
+    if not shifts or not location: return location
+    if isinstance(location[0], tuple): return tuple(_shifted_location(line, shifts) for line in location)
+    if 'parameters' not in location: return location
+    list_location, command = _command_position(location)
+    if list_location not in shifts: return location
+    afters, totals = shifts[list_location]
+    return list_location + (command + totals[bisect_left(afters, command)],) + location[len(list_location) + 1:]
+
+def _block_shifts(resized):
+    """Shifts (see _shifted_location) for message blocks resized to new line counts, given (location, line count) pairs."""
+    by_list = {}
+    for location, count in resized:
+        list_location, last = _command_position(location[-1])
+        by_list.setdefault(list_location, []).append((last, count - len(location)))
+    shifts = {}
+    for list_location, changes in by_list.items():
+        changes.sort()
+        totals = [0]
+        for _, added in changes: totals.append(totals[-1] + added)
+        shifts[list_location] = ([last for last, _ in changes], totals)
+    return shifts
+
+def _block_location(location, count, shifts):
+    """The line locations of a message block resized to `count` lines, once all the shifts are applied."""
+    kept = _shifted_location(location[:count], shifts)
+    list_location, last = _command_position(kept[-1])
+    return kept + tuple(list_location + (last + j, 'parameters', 0) for j in range(1, count - len(location) + 1))
+
+def _resize_block(data, location, lines, code, indent):
+    """
+    Gives a message block one command per line: continuation commands are inserted after its last
+    line, or its surplus last commands removed. Returns (list, index, removed commands, inserted
+    count) for restore_units; list is None for streamed files, whose patches are cleared instead.
+    """
+    list_location, last = _command_position(location[-1])
+    if len(lines) > len(location):
+        index, count = last + 1, 0
+        commands = [{'code': code, 'indent': indent, 'parameters': [line]} for line in lines[len(location):]]
+    else:
+        index, count, commands = last + 1 - (len(location) - len(lines)), len(location) - len(lines), []
+    if isinstance(data, JsonItemPatches):
+        data.splice(list_location, index, count, commands)
+        return None, index, [], len(commands)
+    container, _ = _resolve_container(data, list_location + (index,))
+    removed = container[index:index + count]
+    container[index:index + count] = commands
+    return container, index, removed, len(commands)
+
+def apply_units(units, results, log, file_name='', relative_path=None, data=None):
+    """
+    Writes translations back into the parsed data and records them in a TranslationLog. Returns the number of translated units.
+    A message block gets one 401/405 command per line of its rewrapped translation: continuation
+    commands are inserted after its last line, surplus ones removed, and the logged locations are
+    those of the written file. Without data to resize, the block keeps its line count.
+    """
+    translations = 0
+    log.begin_file(file_name, relative_path)
+    block_lines, resized, by_width = {}, [], {}
+    for n, unit in enumerate(units):
+        tr, success = results[unit['raw']]
+        if not success: continue
+        if 'lines' not in unit:
+            # Descriptions and profiles of a file are wrapped together, once per distinct text.
+            if unit['max_len']: by_width.setdefault(unit['max_len'], []).append(tr)
+            continue
+        lines = reflow_lines([tr], unit['width']) if data is not None else reflow_lines([tr], unit['width'], len(unit['lines']))
+        if len(lines) != len(unit['lines']): resized.append(n)
+        block_lines[n] = lines
+    shifts = _block_shifts([(units[n]['location'], len(block_lines[n])) for n in resized])
+    wrapped = {(max_len, text): lines for max_len, texts in by_width.items()
+               for text, lines in zip(texts, print_neatly_batch(texts, max_len))}
+
+    for n, unit in enumerate(units):
+        tr, success = results[unit['raw']]
+        if not success:
+            log.anomaly(unit['path'], unit['raw'])
+            continue
+        translations += 1
+        if 'lines' in unit:
+            lines = block_lines[n]
+            for (container, key), line in zip(unit['lines'], lines): container[key] = line
+            log.add(unit['type'], unit['path'], unit['index'], unit['total'], unit['raw'], '\n'.join(lines),
+                    _block_location(unit['location'], len(lines), shifts), unit['width'])
+            continue
+        if unit['max_len']: tr = '\n'.join(wrapped[unit['max_len'], tr])
+        log.add(unit['type'], unit['path'], unit['index'], unit['total'], unit['raw'], tr, _shifted_location(unit['location'], shifts))
+        unit['container'][unit['key']] = tr
+
+    # Last index first, so the source indexes of the others still hold.
+    for n in sorted(resized, key=lambda n: _command_position(units[n]['location'][-1])[1], reverse=True):
+        unit = units[n]
+        unit['spliced'] = _resize_block(data, unit['location'], block_lines[n], unit['code'], unit['indent'])
+    return translations
+
+def apply_edits(data, log, edits):
+    """
+    Writes edited translations into the parsed data of one output file and into its log records.
+    edits maps log positions of that file to their new text. A message block keeps the editor's
+    line breaks, wraps lines wider than its width and gains or loses 401/405 commands to fit; the
+    locations of the file's other records are shifted to match. Returns the positions of every
+    changed record.
+    """
+    blocks, resized = {}, []
+    for position, text in edits.items():
+        location = log.records[position].location
+        if location and isinstance(location[0], tuple):
+            width = log.records[position].width or MESSAGE_LINE_WIDTH
+            lines = blocks[position] = [line for part in text.split('\n') for line in print_neatly(part, width)]
+            for line_location, line in zip(location, lines):
+                container, key = _resolve_container(data, line_location)
+                container[key] = line
+            if len(lines) != len(location):
+                list_location, last = _command_position(location[-1])
+                command = _resolve_container(data, list_location + (last,))[0][last]
+                resized.append((location, lines, command['code'], command.get('indent', 0)))
+        else:
+            container, key = _resolve_container(data, location)
+            container[key] = text
+            log.set_translation(position, text)
+    shifts = _block_shifts([(location, len(lines)) for location, lines, _, _ in resized])
+    # Last index first, so the source indexes of the others still hold.
+    for block in sorted(resized, key=lambda block: _command_position(block[0][-1])[1], reverse=True): _resize_block(data, *block)
+
+    changed = set(edits)
+    for start, end in {log.segment_bounds(position) for position in edits}:
+        for position in range(start, end):
+            record = log.records[position]
+            if position in blocks:
+                lines = blocks[position]
+                updated = record._replace(translated='\n'.join(lines), location=_block_location(record.location, len(lines), shifts))
+            else: updated = record._replace(location=_shifted_location(record.location, shifts))
+            if updated != record:
+                log.records[position] = updated
+                changed.add(position)
+    return sorted(changed)
+
+def load_file_units(file_path, file_name):
+    """Parses (or streams) a data file. Returns (data, units); units is None if the file is not translated."""
+    if file_name.startswith('Map') and os.path.getsize(file_path) >= STREAMING_THRESHOLD_BYTES:
+        units, data = extract_dialog_units_streaming(read_json_text(file_path))
+        return data, units
+    data = parse_json_file(file_path)
+    return data, extract_file_units(file_name, data)
+
+def save_translated_file(data, file_path, translated_file_path):
+    os.makedirs(os.path.dirname(translated_file_path), exist_ok=True)
+    if isinstance(data, JsonItemPatches): save_json_patches(data, file_path, translated_file_path)
+    else: save_json_file(data, translated_file_path)
+
+def _extract_texts_worker(file_path):
+    """Process-pool stage 1: returns (texts, error, seconds) for one file; texts is None if the file is not translated."""
+    started = time.perf_counter()
+    try:
+        data, units = load_file_units(file_path, os.path.basename(file_path))
+        return (None if units is None else [unit['raw'] for unit in units]), None, time.perf_counter() - started
+    except Exception as e:
+        return None, str(e), time.perf_counter() - started
+
+def restore_units(units, data):
+    """Puts the source text back into data, so the same extraction can be applied for another language."""
+    if isinstance(data, JsonItemPatches):
+        data.clear()
+        for unit in units: unit.pop('spliced', None)
+        return
+    for unit in units:
+        if 'lines' in unit:
+            for (container, key), line in zip(unit['lines'], unit['raw_lines']): container[key] = line
+            # Resized blocks go back in source order: earlier ones no longer shift later ones.
+            if 'spliced' in unit:
+                commands, index, removed, inserted = unit.pop('spliced')
+                commands[index:index + inserted] = removed
+        else: unit['container'][unit['key']] = unit['raw']
+
+def _write_outputs(file_path, data, units, outputs):
+    """
+    Applies each (log_name, relative_path, translated_file_path, results) output to one extracted
+    file in turn and writes it. Returns a (translations, TranslationLog, success) per output.
+    """
+    written = []
+    for n, (log_name, relative_path, translated_file_path, results) in enumerate(outputs):
+        log = TranslationLog()
+        try:
+            if n: restore_units(units, data)
+            translations = apply_units(units, results, log, log_name, relative_path, data)
+            save_translated_file(data, file_path, translated_file_path)
+            written.append((translations, log, True))
+        except Exception as e:
+            log.error(f"CRITICAL ERROR processing {log_name}: {str(e)}")
+            written.append((0, log, False))
+    return written
+
+def _write_file_worker(task):
+    """Process-pool stage 2: re-extracts one file and writes every output of it. Returns (_write_outputs result, seconds)."""
+    file_path, outputs = task
+    started = time.perf_counter()
+    try:
+        data, units = load_file_units(file_path, os.path.basename(file_path))
+        return _write_outputs(file_path, data, units, outputs), time.perf_counter() - started
+    except Exception as e:
+        failed = []
+        for log_name, _, _, _ in outputs:
+            log = TranslationLog()
+            log.error(f"CRITICAL ERROR processing {log_name}: {str(e)}")
+            failed.append((0, log, False))
+        return failed, time.perf_counter() - started
+
+def _translate_units(units, data, src, dst, logs, stats, kind):
+    started = time.perf_counter()
+    results = translate_texts([unit['raw'] for unit in units], src, dst, stats=stats)
+    translations = apply_units(units, results, logs, data=data)
+    FILE_SECONDS.observe(time.perf_counter() - started, kind)
     return data, translations
 
-def translate_rpgm_file(job_id, target_language, source_language='it'):
+def translate_objects_file(data, src, dst, logs, max_len=55, stats=None):
+    return _translate_units(extract_objects_units(data, max_len), data, src, dst, logs, stats, 'database')
+
+def translate_dialogs_file(data, src, dst, logs, max_len=40, use_neatly=False, stats=None):
+    # Message blocks are always rewrapped to their window width (see iter_command_strings);
+    # max_len and use_neatly are only kept for existing callers.
+    return _translate_units(extract_dialog_units(data), data, src, dst, logs, stats, 'map')
+
+def translate_common_events_file(data, src, dst, logs, max_len=55, stats=None):
+    return _translate_units(extract_common_event_units(data), data, src, dst, logs, stats, 'common_events')
+
+def target_language_list(target_language):
+    """Target languages of a job: a list, or a comma-separated string as stored in the job queue."""
+    if isinstance(target_language, str): target_language = target_language.split(',')
+    return list(dict.fromkeys(language.strip() for language in target_language if language and language.strip()))
+
+def record_edits(job_id, status, edited):
+    """
+    Carries edits of a completed job over to its project manifests, so the next run reuses the
+    edited files and strings. `edited` maps the relative path of each edited output file to (all
+    its LogRecords, the edited ones).
+    """
+    languages = status.get('target_languages') or []
+    if status.get('project_id') is None or not languages: return
+    for relative_path, (records, edited_records) in edited.items():
+        language, source_path = languages[0], relative_path
+        if len(languages) > 1: language, source_path = relative_path.split(os.sep, 1)
+        source_file_path = os.path.join(get_file_path(job_id), source_path)
+        if not os.path.exists(source_file_path): continue
+        manifest = ProjectManifest(status['project_id'], status.get('backend', backend.name), status.get('source_language', 'it'), language)
+        manifest.apply_edit(source_path, file_digest(source_file_path),
+                            os.path.join(get_file_path(job_id, translated=True), relative_path), records, edited_records)
+        manifest.close()
+
+def translate_rpgm_file(job_id, target_language, source_language='it', original_filename=None, project_id=None,
+                        source_dir=None, output_dir=None, process_pool=None):
+    """
+    Translates an uploaded project into one or more target languages. The files are parsed and
+    extracted once; every language then translates its share of the strings concurrently and
+    writes its own output. With several languages each one gets a subfolder of the translated
+    directory, its own archive and its own entry in the status's `languages`.
+    source_dir / output_dir replace the job's upload and translated folders (output_dir may be
+    source_dir to translate in place); process_pool is an executor shared with other jobs.
+    """
     try:
         initial_status = get_translation_status(job_id)
-        original_filename = initial_status.get('original_filename', 'project')
+        original_filename = original_filename or initial_status.get('original_filename') or 'project'
         base_name = os.path.splitext(original_filename)[0]
-        zip_filename = f"{target_language}_{base_name}.zip"
+        languages = target_language_list(target_language)
+        if not languages: raise ValueError("No target language given.")
+        multiple = len(languages) > 1
+        zip_filename = f"{'-'.join(languages)}_{base_name}.zip"
 
         update_translation_status(job_id, {'status': 'processing', 'total_files': 0, 'current_file': 0, 'logs': []})
-        
-        source_dir = get_file_path(job_id)
-        translated_dir = create_translated_directory(job_id)
-        rpgm_files = get_rpgm_files(source_dir)
-        
+
+        timer = StageTimer()
+        with timer.stage('scan'):
+            source_dir = source_dir or get_file_path(job_id)
+            translated_dir = output_dir or create_translated_directory(job_id)
+            rpgm_files = get_rpgm_files(source_dir)
+
         if not rpgm_files:
             error_message = "No RPG Maker files found. Please upload a .zip file of your project containing the 'data' folder with .json files, or a single .json file."
             update_translation_status(job_id, {'status': 'error', 'message': error_message})
+            JOBS.inc('error')
             return {'status': 'error', 'message': error_message}
+        if output_dir: os.makedirs(output_dir, exist_ok=True)
 
-        structured_logs = []
-        update_translation_status(job_id, {'status': 'processing', 'total_files': len(rpgm_files), 'current_file': 0, 'logs': structured_logs})
-        
-        total_translations = 0
-        for i, file_path in enumerate(rpgm_files):
-            file_name = os.path.basename(file_path)
-            update_translation_status(job_id, {'status': 'processing', 'total_files': len(rpgm_files), 'current_file': i + 1, 'logs': structured_logs})
-            
-            try:
-                data = parse_json_file(file_path); t = 0
-                if file_name.startswith('Map'): data, t = translate_dialogs_file(data, source_language, target_language, structured_logs, use_neatly=True)
-                elif file_name == 'CommonEvents.json': data, t = translate_common_events_file(data, source_language, target_language, structured_logs)
-                elif file_name in ['Actors.json', 'Classes.json', 'Skills.json', 'Items.json', 'Weapons.json', 'Armors.json', 'Enemies.json', 'States.json', 'System.json']:
-                    data, t = translate_objects_file(data, source_language, target_language, structured_logs)
-                else: continue
-                
-                for log_entry in structured_logs:
-                    if log_entry.get('file') == '': log_entry['file'] = file_name
-
-                total_translations += t
-                relative_path = os.path.relpath(file_path, source_dir)
-                translated_file_path = os.path.join(translated_dir, relative_path)
-                os.makedirs(os.path.dirname(translated_file_path), exist_ok=True)
-                save_json_file(data, translated_file_path)
-            except Exception as e:
-                structured_logs.append({'type': 'error', 'message': f"CRITICAL ERROR processing {file_name}: {str(e)}"})
-                update_translation_status(job_id, {'status': 'processing', 'total_files': len(rpgm_files), 'current_file': i + 1, 'logs': structured_logs})
-                continue
-        
-        zip_path = create_zip(translated_dir, job_id, zip_filename)
+        structured_logs = TranslationLog()
+        job_stats = {'cache_hits': 0, 'cache_misses': 0, 'backend_calls': 0, 'retries': 0, 'failed_strings': 0,
+                     'unique_strings': 0, 'translated_strings': 0, 'strings_per_second': 0,
+                     'unchanged_files': 0, 'reused_strings': 0, 'unmasked_retries': 0}
+        language_status = {language: {'progress': 0, 'unique_strings': 0, 'translated_strings': 0, 'reused_strings': 0,
+                                      'unchanged_files': 0, 'total_translations': 0,
+                                      'download_url': f"/api/download/{job_id}?language={language}",
+                                      'zip_filename': f"{language}_{base_name}.zip"} for language in languages}
+        file_seconds = {}
+
+        def report(stage, current_file, progress):
+            patch_translation_status(job_id, {'status': 'processing', 'stage': stage, 'progress': progress, 'total_files': len(rpgm_files), 'current_file': current_file, 'logs': structured_logs, 'stage_seconds': dict(timer.seconds), 'target_languages': languages, 'languages': language_status, **job_stats})
+
+        def file_done(file_path, seconds):
+            file_seconds[file_path] = file_seconds.get(file_path, 0) + seconds
+
+        # With several languages, paths inside the translated directory and file names in the log carry the language.
+        def output_path(language, relative_path):
+            return os.path.join(language, relative_path) if multiple else relative_path
+
+        def log_name(language, file_name):
+            return f"{language}/{file_name}" if multiple else file_name
+
+        report('extracting', 0, 0)
+        # Files whose content hash matches the project's previous run are reused as they are.
+        with timer.stage('scan'):
+            manifests = {language: ProjectManifest(project_id, backend.name, source_language, language) for language in languages}
+            relative_paths = {file_path: os.path.relpath(file_path, source_dir) for file_path in rpgm_files}
+            digests = {file_path: file_digest(file_path) for file_path in rpgm_files}
+            total_translations = 0
+            pending_languages = {}
+            for file_path in rpgm_files:
+                relative_path = relative_paths[file_path]
+                for language, manifest in manifests.items():
+                    if manifest.unchanged(relative_path, digests[file_path]):
+                        reused = manifest.reuse_output(relative_path, os.path.join(translated_dir, output_path(language, relative_path)))
+                        structured_logs.extend(manifest.reused_log(relative_path, log_name(language, os.path.basename(file_path)),
+                                                                   output_path(language, relative_path)))
+                        total_translations += reused
+                        language_status[language]['total_translations'] += reused
+                        language_status[language]['unchanged_files'] += 1
+                    else:
+                        pending_languages.setdefault(file_path, []).append(language)
+                if file_path not in pending_languages: job_stats['unchanged_files'] += 1
+            pending_files = list(pending_languages)
+
+        workers = PROCESS_WORKERS if len(pending_files) > 1 else 0
+        pool = (process_pool or ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))) if workers > 1 else None
+        chunksize = max(1, len(pending_files) // (workers * 4)) if pool else 1
+        try:
+            # Each entry is [file_path, file_name, data, units, texts]; data and units stay in
+            # the worker processes when a pool is used, so only the texts come back here.
+            extracted = []
+            with timer.stage('extract'):
+                if pool:
+                    for i, (file_path, (texts, error, seconds)) in enumerate(zip(pending_files, pool.map(_extract_texts_worker, pending_files, chunksize=chunksize))):
+                        report('extracting', i + 1, 10 * i / len(pending_files))
+                        file_done(file_path, seconds)
+                        if error: structured_logs.error(f"CRITICAL ERROR processing {os.path.basename(file_path)}: {error}")
+                        elif texts is not None: extracted.append([file_path, os.path.basename(file_path), None, None, texts])
+                        else:
+                            for language in pending_languages[file_path]: manifests[language].record(relative_paths[file_path], digests[file_path])
+                else:
+                    for i, file_path in enumerate(pending_files):
+                        file_name = os.path.basename(file_path)
+                        report('extracting', i + 1, 10 * i / len(pending_files))
+                        started = time.perf_counter()
+                        try:
+                            data, units = load_file_units(file_path, file_name)
+                            if units is not None: extracted.append([file_path, file_name, data, units, [unit['raw'] for unit in units]])
+                            else:
+                                for language in pending_languages[file_path]: manifests[language].record(relative_paths[file_path], digests[file_path])
+                        except Exception as e:
+                            structured_logs.error(f"CRITICAL ERROR processing {file_name}: {str(e)}")
+                        file_done(file_path, time.perf_counter() - started)
+
+            progress_lock = threading.Lock()
+
+            def on_progress(language, done, unique):
+                with progress_lock:
+                    language_status[language].update(translated_strings=done, unique_strings=unique, progress=round(100 * done / unique, 2))
+                    job_stats['translated_strings'] = sum(entry['translated_strings'] for entry in language_status.values())
+                    job_stats['unique_strings'] = sum(entry['unique_strings'] for entry in language_status.values())
+                    job_stats['strings_per_second'] = round(job_stats['translated_strings'] / max(time.time() - translate_started, 1e-6), 2)
+                    report('translating', 0, 10 + 80 * job_stats['translated_strings'] / max(job_stats['unique_strings'], 1))
+
+            def translate_language(language):
+                manifest = manifests[language]
+                entries = [entry for entry in extracted if language in pending_languages[entry[0]]]
+                known = {}
+                for entry in entries:
+                    for text in entry[4]:
+                        translation = manifest.known_translation(text)
+                        if translation is not None: known[text] = (translation, True)
+                language_status[language]['reused_strings'] = len(known)
+                texts = [text for entry in entries for text in entry[4] if text not in known]
+                results = translate_texts(texts, source_language, language, stats=job_stats, job_key=(job_id, language),
+                                          progress=lambda done, unique: on_progress(language, done, unique))
+                results.update(known)
+                language_status[language]['progress'] = 100
+                return results
+
+            with timer.stage('translate'):
+                translate_started = time.time()
+                # Languages share the batch pool, which interleaves their batches fairly.
+                if multiple:
+                    with ThreadPoolExecutor(len(languages), thread_name_prefix=f'translate-{job_id}') as executor:
+                        results = dict(zip(languages, executor.map(translate_language, languages)))
+                else:
+                    results = {languages[0]: translate_language(languages[0])}
+                job_stats['reused_strings'] = sum(entry['reused_strings'] for entry in language_status.values())
+
+            def outputs_of(entry):
+                return [(log_name(language, entry[1]), output_path(language, relative_paths[entry[0]]),
+                         os.path.join(translated_dir, output_path(language, relative_paths[entry[0]])), results[language])
+                        for language in pending_languages[entry[0]]]
+
+            def record_outputs(entry, written, outputs):
+                nonlocal total_translations
+                for language, (translations, file_log, success), output in zip(pending_languages[entry[0]], written, outputs):
+                    total_translations += translations
+                    language_status[language]['total_translations'] += translations
+                    structured_logs.extend(file_log)
+                    if success: manifests[language].record(relative_paths[entry[0]], digests[entry[0]], entry[4], output[3], translations, output[2], file_log)
+
+            with timer.stage('write'):
+                if pool:
+                    # Workers only get the translations of their own file.
+                    tasks = [(entry[0], [output[:3] + ({text: output[3][text] for text in entry[4]},) for output in outputs_of(entry)])
+                             for entry in extracted]
+                    for i, ((written, seconds), entry, task) in enumerate(zip(pool.map(_write_file_worker, tasks, chunksize=chunksize), extracted, tasks)):
+                        report('writing', i + 1, 90 + 10 * i / len(extracted))
+                        file_done(entry[0], seconds)
+                        record_outputs(entry, written, outputs_of(entry))
+                else:
+                    for i, entry in enumerate(extracted):
+                        report('writing', i + 1, 90 + 10 * i / len(extracted))
+                        started = time.perf_counter()
+                        outputs = outputs_of(entry)
+                        record_outputs(entry, _write_outputs(entry[0], entry[2], entry[3], outputs), outputs)
+                        file_done(entry[0], time.perf_counter() - started)
+        finally:
+            if pool and pool is not process_pool: pool.shutdown()
+        with timer.stage('manifest'):
+            for manifest in manifests.values():
+                manifest.save()
+                manifest.close()
+        timer.finish()
+        for file_path, seconds in file_seconds.items(): FILE_SECONDS.observe(seconds, file_kind(os.path.basename(file_path)))
+
+        job_stats['stage_seconds'] = timer.seconds
+        lookups = job_stats['cache_hits'] + job_stats['cache_misses']
+        job_stats['cache_hit_rate'] = round(job_stats['cache_hits'] / lookups, 4) if lookups else 0
+        job_stats['slowest_files'] = [{'file': relative_paths[file_path], 'seconds': round(seconds, 4)}
+                                      for file_path, seconds in sorted(file_seconds.items(), key=lambda item: -item[1])[:SLOWEST_FILES]]
+        for entry in language_status.values(): entry['progress'] = 100
         final_status = {'status': 'completed',
                          'total_files': len(rpgm_files),
                          'current_file': len(rpgm_files),
                          'logs': structured_logs,
                          'download_url': f"/api/download/{job_id}",
                          'total_translations': total_translations,
-                         'zip_filename': zip_filename
+                         'zip_filename': zip_filename,
+                         'target_languages': languages,
+                         'languages': language_status,
+                         'project_id': project_id,
+                         'backend': backend.name,
+                         'source_language': source_language,
+                         **job_stats
                          }
-        
+
         update_translation_status(job_id, final_status)
+        JOBS.inc('completed')
         return final_status
-    
+
     except Exception as e:
         error_status = {'status': 'error', 'message': str(e)}
         update_translation_status(job_id, error_status)
-        return error_status
\ No newline at end of file
+        JOBS.inc('error')
+        return error_status
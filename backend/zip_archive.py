@@ -0,0 +1,197 @@
+import os
+import stat
+import time
+import zlib
+import struct
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Layouts from the ZIP spec (same as zipfile's structFileHeader / structCentralDir / structEndArchive)
+LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+CENTRAL_HEADER = struct.Struct('<4s4B4HL2L5H2L')
+END_RECORD = struct.Struct('<4s4H2LH')
+ZIP32_LIMIT = 0xFFFFFFFF
+CHUNK_SIZE = 1 << 20
+
+# Output archive compression: 'stored' (no compression), 'fast', 'default' or 'max'
+ZIP_COMPRESSION = os.environ.get('ZIP_COMPRESSION', 'default')
+ZIP_WORKERS = int(os.environ.get('ZIP_WORKERS', min(4, os.cpu_count() or 1)))
+COMPRESSION_MODES = {
+    'stored': (zipfile.ZIP_STORED, 0),
+    'fast': (zipfile.ZIP_DEFLATED, 1),
+    'default': (zipfile.ZIP_DEFLATED, 6),
+    'max': (zipfile.ZIP_DEFLATED, 9),
+}
+
+def compression_settings(mode=None):
+    """Returns (method, level) for a compression mode name; unknown names fall back to 'default'."""
+    mode = mode or ZIP_COMPRESSION
+    if mode not in COMPRESSION_MODES:
+        print(f"Unknown ZIP_COMPRESSION '{mode}', using 'default'.")
+        mode = 'default'
+    return COMPRESSION_MODES[mode]
+
+def dos_date_time(date_time):
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+def file_date_time(file_path):
+    date_time = time.localtime(os.stat(file_path).st_mtime)[:6]
+    return date_time if date_time[0] >= 1980 else (1980, 1, 1, 0, 0, 0)
+
+def compress_bytes(data, method=zipfile.ZIP_DEFLATED, level=6):
+    """Returns (crc, compressed_data) for one member, as raw deflate or stored bytes."""
+    crc = zlib.crc32(data)
+    if method == zipfile.ZIP_STORED: return crc, data
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return crc, compressor.compress(data) + compressor.flush()
+
+def iter_raw_member(fp, info, chunk_size=CHUNK_SIZE):
+    """Yields the still-compressed bytes of a member of an open archive file."""
+    fp.seek(info.header_offset)
+    header = LOCAL_HEADER.unpack(fp.read(LOCAL_HEADER.size))
+    fp.seek(header[10] + header[11], os.SEEK_CUR)
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = fp.read(min(chunk_size, remaining))
+        if not chunk: raise zipfile.BadZipFile(f"Truncated member {info.filename}")
+        remaining -= len(chunk)
+        yield chunk
+
+class RawZipWriter:
+    """
+    Minimal ZIP writer for members that are already compressed, so they can be compressed on
+    other threads or copied verbatim from another archive. No ZIP64: oversized archives raise
+    zipfile.LargeZipFile.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.offset = 0
+        self.entries = []
+
+    def _write(self, data):
+        self.fp.write(data)
+        self.offset += len(data)
+
+    def add(self, name, method, crc, compress_size, file_size, date_time, chunks):
+        if self.offset > ZIP32_LIMIT or compress_size > ZIP32_LIMIT or file_size > ZIP32_LIMIT:
+            raise zipfile.LargeZipFile("Archive too large without ZIP64")
+        name_bytes = name.replace(os.sep, '/').encode('utf-8')
+        flags = 0x800 if not name.isascii() else 0
+        dos_time, dos_date = dos_date_time(date_time)
+        header_offset = self.offset
+        self._write(LOCAL_HEADER.pack(b'PK\x03\x04', 20, 0, flags, method, dos_time, dos_date,
+                                      crc, compress_size, file_size, len(name_bytes), 0))
+        self._write(name_bytes)
+        for chunk in chunks: self._write(chunk)
+        self.entries.append((name_bytes, flags, method, dos_time, dos_date, crc, compress_size, file_size, header_offset))
+
+    def add_bytes(self, name, data, method=zipfile.ZIP_DEFLATED, level=6, date_time=None):
+        crc, compressed = compress_bytes(data, method, level)
+        self.add(name, method, crc, len(compressed), len(data), date_time or time.localtime()[:6], [compressed])
+
+    def close(self):
+        if len(self.entries) > 0xFFFF: raise zipfile.LargeZipFile("Too many members without ZIP64")
+        directory_offset = self.offset
+        for name_bytes, flags, method, dos_time, dos_date, crc, compress_size, file_size, header_offset in self.entries:
+            self._write(CENTRAL_HEADER.pack(b'PK\x01\x02', 20, 3, 20, 0, flags, method, dos_time, dos_date,
+                                            crc, compress_size, file_size, len(name_bytes), 0, 0, 0, 0,
+                                            (stat.S_IFREG | 0o644) << 16, header_offset))
+            self._write(name_bytes)
+        directory_size = self.offset - directory_offset
+        if directory_offset > ZIP32_LIMIT: raise zipfile.LargeZipFile("Archive too large without ZIP64")
+        self._write(END_RECORD.pack(b'PK\x05\x06', 0, 0, len(self.entries), len(self.entries),
+                                    directory_size, directory_offset, 0))
+
+def directory_members(directory):
+    """Lists (arcname, file_path) for every file under directory, in a stable order."""
+    members = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
+            file_path = os.path.join(root, file)
+            members.append((os.path.relpath(file_path, directory).replace(os.sep, '/'), file_path))
+    return members
+
+def _compress_file(member, method, level):
+    arcname, file_path = member
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    crc, compressed = compress_bytes(data, method, level)
+    return arcname, crc, compressed, len(data), file_date_time(file_path)
+
+def iter_compressed_members(members, method, level, workers=ZIP_WORKERS):
+    """
+    Compresses (arcname, file_path) members on a thread pool (zlib releases the GIL) and yields
+    (arcname, crc, compressed_data, file_size, date_time) in the original order. At most
+    2 * workers members are held in memory at once.
+    """
+    if workers <= 1 or method == zipfile.ZIP_STORED:
+        for member in members: yield _compress_file(member, method, level)
+        return
+    with ThreadPoolExecutor(workers, thread_name_prefix='zip') as executor:
+        pending = deque()
+        for member in members:
+            pending.append(executor.submit(_compress_file, member, method, level))
+            if len(pending) >= 2 * workers: yield pending.popleft().result()
+        while pending: yield pending.popleft().result()
+
+class ChunkSink(list):
+    """File-like object that keeps written bytes as a list of chunks, for streaming an archive out."""
+    write = list.append
+
+    def drain(self):
+        data = b''.join(self)
+        self.clear()
+        return data
+
+def _write_directory(writer, directory, compression, workers):
+    method, level = compression_settings(compression)
+    for arcname, crc, compressed, file_size, date_time in iter_compressed_members(directory_members(directory), method, level, workers):
+        writer.add(arcname, method, crc, len(compressed), file_size, date_time, [compressed])
+        yield
+    writer.close()
+    yield
+
+def write_directory_zip(directory, zip_path, compression=None, workers=ZIP_WORKERS):
+    """Zips every file under directory into zip_path (written to a temporary file, then renamed)."""
+    temporary_path = zip_path + '.tmp'
+    with open(temporary_path, 'wb') as out:
+        for _ in _write_directory(RawZipWriter(out), directory, compression, workers): pass
+    os.replace(temporary_path, zip_path)
+    return zip_path
+
+def iter_directory_zip(directory, compression=None, workers=ZIP_WORKERS):
+    """Yields the bytes of a zip of every file under directory, one member at a time, without writing it to disk."""
+    sink = ChunkSink()
+    for _ in _write_directory(RawZipWriter(sink), directory, compression, workers):
+        data = sink.drain()
+        if data: yield data
+
+def update_zip_members(zip_path, replacements, compression=None):
+    """
+    Rewrites zip_path with the members in `replacements` ({arcname: file_path}) taken from disk.
+    Every other member is copied as raw compressed bytes, so nothing else is recompressed.
+    """
+    method, level = compression_settings(compression)
+    temporary_path = zip_path + '.tmp'
+    written = set()
+    with zipfile.ZipFile(zip_path, 'r') as source, open(zip_path, 'rb') as source_fp, open(temporary_path, 'wb') as out:
+        writer = RawZipWriter(out)
+        for info in source.infolist():
+            if info.filename in written: continue
+            written.add(info.filename)
+            if info.filename in replacements:
+                with open(replacements[info.filename], 'rb') as f:
+                    writer.add_bytes(info.filename, f.read(), method, level, file_date_time(replacements[info.filename]))
+            else:
+                writer.add(info.filename, info.compress_type, info.CRC, info.compress_size, info.file_size,
+                           info.date_time, iter_raw_member(source_fp, info))
+        for arcname, file_path in replacements.items():
+            if arcname in written: continue
+            with open(file_path, 'rb') as f:
+                writer.add_bytes(arcname, f.read(), method, level, file_date_time(file_path))
+        writer.close()
+    os.replace(temporary_path, zip_path)
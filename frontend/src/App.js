@@ -33,6 +33,17 @@ function App() {
     }
   };
 
+  const fetchRemainingLogs = async (cursor, logCount) => {
+    while (cursor < logCount) {
+      const pageResponse = await axios.get(`/api/status/${jobId}?since=${cursor}`);
+      const pageLogs = pageResponse.data.logs || [];
+      if (pageLogs.length === 0) break;
+      cursor = pageResponse.data.next_cursor;
+      logCount = pageResponse.data.log_count;
+      setTranslationLogs((previousLogs) => previousLogs.concat(pageLogs));
+    }
+  };
+
   const handleTranslate = async () => {
     if (!jobId) return;
     setTranslationLogs([]);
@@ -50,33 +61,45 @@ function App() {
         return;
       }
       
+      let logCursor = 0;
+      let polling = false;
       const pollInterval = setInterval(async () => {
+        if (polling) return;
+        polling = true;
         try {
-          const pollResponse = await axios.get(`/api/status/${jobId}`);
+          const pollResponse = await axios.get(`/api/status/${jobId}?since=${logCursor}`);
+          const newLogs = pollResponse.data.logs || [];
+          logCursor = pollResponse.data.next_cursor;
+          if (newLogs.length > 0) {
+            setTranslationLogs((previousLogs) => previousLogs.concat(newLogs));
+          }
           
           if (pollResponse.data.status === 'completed') {
             clearInterval(pollInterval);
             setTranslationProgress(100);
-            setTranslationLogs(pollResponse.data.logs);
             
             const absoluteDownloadUrl = `${BACKEND_URL}${pollResponse.data.download_url}`;
             setDownloadUrl(absoluteDownloadUrl);
             
             setCurrentStep(3);
+            await fetchRemainingLogs(logCursor, pollResponse.data.log_count);
           } else if (pollResponse.data.status === 'error') {
             clearInterval(pollInterval);
             setError(pollResponse.data.message);
           } else {
-            const progress = pollResponse.data.total_files > 0 
-              ? (pollResponse.data.current_file / pollResponse.data.total_files) * 100 
-              : 0;
+            const progress = pollResponse.data.progress !== undefined
+              ? pollResponse.data.progress
+              : pollResponse.data.total_files > 0 
+                ? (pollResponse.data.current_file / pollResponse.data.total_files) * 100 
+                : 0;
             setTranslationProgress(progress);
-            setTranslationLogs(pollResponse.data.logs);
           }
         } catch (err) {
           clearInterval(pollInterval);
           setError('Failed to get translation status. Please try again.');
           console.error('Status polling error:', err);
+        } finally {
+          polling = false;
         }
       }, 1000);
       
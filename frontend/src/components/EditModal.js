@@ -2,6 +2,7 @@ import React, { useState, useEffect } from "react";
 import axios from "axios";
 const EditModal = ({ jobId, onSave, onClose }) => {
   const [editedLogs, setEditedLogs] = useState([]);
+  const [changedIds, setChangedIds] = useState(new Set());
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [saving, setSaving] = useState(false);
@@ -9,8 +10,16 @@ const EditModal = ({ jobId, onSave, onClose }) => {
     const fetchLogs = async () => {
       try {
         setLoading(true);
-        const response = await axios.get(`/api/translated_data/${jobId}`);
-        setEditedLogs(response.data.logs);
+        let logs = [];
+        let offset = 0;
+        while (offset !== null) {
+          const response = await axios.get(
+            `/api/translated_data/${jobId}?offset=${offset}`
+          );
+          logs = logs.concat(response.data.logs);
+          offset = response.data.next_offset;
+        }
+        setEditedLogs(logs);
       } catch (err) {
         setError("Failed to load translation logs. Please try again.");
         console.error("Error fetching logs:", err);
@@ -22,16 +31,23 @@ const EditModal = ({ jobId, onSave, onClose }) => {
       fetchLogs();
     }
   }, [jobId]);
-  const handleTranslationChange = (index, newTranslation) => {
-    const updatedLogs = [...editedLogs];
-    updatedLogs[index] = { ...updatedLogs[index], translated: newTranslation };
-    setEditedLogs(updatedLogs);
+  const handleTranslationChange = (id, newTranslation) => {
+    setEditedLogs(
+      editedLogs.map((log) =>
+        log.id === id ? { ...log, translated: newTranslation } : log
+      )
+    );
+    setChangedIds(new Set(changedIds).add(id));
   };
   const handleSave = async () => {
+    if (changedIds.size === 0) {
+      onClose();
+      return;
+    }
     try {
       setSaving(true);
       const response = await axios.post(`/api/edit/${jobId}`, {
-        logs: editedLogs,
+        logs: editedLogs.filter((log) => changedIds.has(log.id)),
       });
       if (response.data.download_url) {
         onSave(response.data.download_url);
@@ -44,7 +60,7 @@ const EditModal = ({ jobId, onSave, onClose }) => {
     }
   };
   const editableLogs = editedLogs.filter(
-    (log) => log.type !== "error" && log.type !== "anomaly"
+    (log) => log.id !== undefined
   );
   if (loading) {
     return (
@@ -102,7 +118,7 @@ const EditModal = ({ jobId, onSave, onClose }) => {
                       rows="2"
                       value={log.translated}
                       onChange={(e) =>
-                        handleTranslationChange(index, e.target.value)
+                        handleTranslationChange(log.id, e.target.value)
                       }
                     />
                   </div>